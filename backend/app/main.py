@@ -11,6 +11,7 @@ from fastapi.openapi.models import Response
 from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import uvicorn
+from google.api_core.exceptions import AlreadyExists
 from datetime import datetime
 import json
 from typing import List, Optional, Dict, Any
@@ -20,7 +21,7 @@ import time
 
 # Import our services
 from backend.services.vertex_ai_service import VertexAIService
-from backend.services.firestore_service import FirestoreService
+from backend.services.firestore_service import FirestoreService, close_async_client
 from backend.services.opportunity_engine import OpportunityEngine
 from backend.services.auth_service import AuthService
 from backend.services.fi_mcp_service import FiMCPService
@@ -29,6 +30,7 @@ from backend.models.schemas import *
 from backend.models.configs import get_settings
 from backend.utils.logging_config import setup_logging
 from backend.utils.middleware import MetricsMiddleware, RateLimitMiddleware
+from backend.utils.cache import get_cache
 
 # Setup logging
 setup_logging()
@@ -55,6 +57,7 @@ async def lifespan(app: FastAPI):
 
     try:
         # Initialize core services
+        services['cache'] = get_cache(settings.REDIS_URL, settings.CACHE_TTL)
         services['firestore'] = FirestoreService(settings)
         services['vertex_ai'] = VertexAIService(settings)
         services['auth'] = AuthService(settings)
@@ -86,6 +89,10 @@ async def lifespan(app: FastAPI):
             if hasattr(service, 'cleanup'):
                 await service.cleanup()
 
+        # The pooled Firestore client is shared process-wide; close it only after every service is done
+        if 'firestore' in services:
+            await close_async_client(services['firestore'].db)
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -217,6 +224,9 @@ async def register_user(request: RegisterRequest):
 
     except HTTPException:
         raise
+    except AlreadyExists:
+        # Lost a race with a concurrent registration for the same email
+        raise HTTPException(status_code=400, detail="User already exists")
     except Exception as e:
         logger.error("❌ User registration failed", error=str(e))
         raise HTTPException(status_code=500, detail="Registration failed")
@@ -269,15 +279,15 @@ async def analyze_opportunities(
         # Get user's Fi MCP scenario
         user_scenario = current_user.get("fi_scenario", "balanced")
 
-        # Get comprehensive financial data from Fi MCP
-        fi_data = await services['fi_mcp'].get_user_financial_data(
-            current_user["user_id"],
-            scenario=user_scenario
+        # Get comprehensive financial data from Fi MCP alongside the user profile and preferences
+        fi_data, user_profile = await asyncio.gather(
+            services['fi_mcp'].get_user_financial_data(
+                current_user["user_id"],
+                scenario=user_scenario
+            ),
+            services['user'].get_user_profile(current_user["user_id"])
         )
 
-        # Get user profile and preferences
-        user_profile = await services['user'].get_user_profile(current_user["user_id"])
-
         # Combine Fi data with user profile
         comprehensive_data = {
             **fi_data,
@@ -335,11 +345,11 @@ async def predict_decision(
                     amount=request.amount,
                     category=request.category)
 
-        # Get current financial state from Fi MCP
-        financial_state = await services['fi_mcp'].get_current_financial_state(current_user["user_id"])
-
-        # Get user context
-        user_context = await services['user'].get_user_context(current_user["user_id"])
+        # Get current financial state from Fi MCP and user context together
+        financial_state, user_context = await asyncio.gather(
+            services['fi_mcp'].get_current_financial_state(current_user["user_id"]),
+            services['user'].get_user_context(current_user["user_id"])
+        )
 
         # Enhanced decision request with real data
         enhanced_request = DecisionRequest(
@@ -389,17 +399,17 @@ async def get_financial_dashboard(
 
         logger.info("📊 Generating financial dashboard", user_id=user_id)
 
-        # Get comprehensive data from Fi MCP
-        financial_data = await services['fi_mcp'].get_comprehensive_financial_data(user_id)
-
-        # Get recent opportunities and predictions
-        recent_analysis = await services['firestore'].get_recent_analysis(user_id, limit=5)
-
-        # Calculate financial health score
-        health_score = await services['vertex_ai'].calculate_financial_health_score(financial_data)
+        # Get comprehensive data from Fi MCP alongside recent opportunities and predictions
+        financial_data, recent_analysis = await asyncio.gather(
+            services['fi_mcp'].get_comprehensive_financial_data(user_id),
+            services['firestore'].get_recent_analysis(user_id, limit=5)
+        )
 
-        # Generate insights
-        insights = await services['vertex_ai'].generate_dashboard_insights(financial_data)
+        # Calculate financial health score and generate insights concurrently
+        health_score, insights = await asyncio.gather(
+            services['vertex_ai'].calculate_financial_health_score(financial_data),
+            services['vertex_ai'].generate_dashboard_insights(financial_data)
+        )
 
         dashboard = DashboardResponse(
             user_id=user_id,
@@ -440,11 +450,8 @@ async def stream_financial_health(
                 # Get real-time data from Fi MCP
                 current_data = await services['fi_mcp'].get_real_time_data(user_id)
 
-                # Calculate health metrics
-                health_metrics = await services['vertex_ai'].calculate_real_time_health(current_data)
-
-                # Detect anomalies
-                anomalies = await services['vertex_ai'].detect_financial_anomalies(current_data)
+                # Health metrics and anomalies come from one model call over the same snapshot
+                health_metrics, anomalies = await services['vertex_ai'].monitor_real_time_data(current_data)
 
                 # Create update
                 update = {
@@ -495,13 +502,10 @@ async def chat_with_ai(
                     message_length=len(request.message))
 
 
-        # Get user's financial context from Fi MCP
-        financial_context = await services['fi_mcp'].get_user_context_for_chat(current_user["user_id"])
-
-        # Get conversation history
-        conversation_history = await services['firestore'].get_conversation_history(
-            current_user["user_id"],
-            limit=10
+        # Get user's financial context from Fi MCP and conversation history together
+        financial_context, conversation_history = await asyncio.gather(
+            services['fi_mcp'].get_user_context_for_chat(current_user["user_id"]),
+            services['firestore'].get_conversation_history(current_user["user_id"], limit=10)
         )
 
         # Generate AI response
@@ -540,6 +544,55 @@ async def chat_with_ai(
         raise HTTPException(status_code=500, detail="Chat processing failed")
 
 
+@app.post("/api/v1/chat/stream", tags=["AI Chat"])
+async def stream_chat_with_ai(
+        request: ChatRequest,
+        current_user: dict = Depends(get_current_user)
+):
+    """Conversational AI interface streamed as server-sent events"""
+    user_id = current_user["user_id"]
+
+    try:
+        financial_context, conversation_history = await asyncio.gather(
+            services['fi_mcp'].get_user_context_for_chat(user_id),
+            services['firestore'].get_conversation_history(user_id, limit=10)
+        )
+    except Exception as e:
+        logger.error("❌ Chat context loading failed", user_id=user_id, error=str(e))
+        raise HTTPException(status_code=500, detail="Chat processing failed")
+
+    async def generate_chat_events():
+        """Forward text chunks as they arrive, then the complete structured response"""
+        chat_response = {}
+        async for event in services['vertex_ai'].stream_chat_response(
+                message=request.message,
+                financial_context=financial_context,
+                conversation_history=conversation_history,
+                user_preferences=current_user.get("preferences", {})
+        ):
+            if event["type"] == "complete":
+                chat_response = event["response"]
+            yield f"data: {json.dumps(event)}\n\n"
+
+        try:
+            await services['firestore'].store_conversation_turn(
+                user_id,
+                request.message,
+                chat_response.get("response", "")
+            )
+        except Exception as e:
+            logger.error("❌ Failed to store streamed conversation", user_id=user_id, error=str(e))
+
+    return StreamingResponse(
+        generate_chat_events(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive"
+        }
+    )
+
+
 # Add new endpoint to switch Fi MCP scenarios
 @app.post("/api/v1/switch-scenario", tags=["Fi MCP"])
 async def switch_fi_scenario(
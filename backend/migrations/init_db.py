@@ -3,6 +3,8 @@ import asyncio
 from google.cloud import firestore
 from datetime import datetime
 import structlog
+from google.api_core.exceptions import AlreadyExists
+from backend.services.firestore_service import email_claim_id, normalize_email
 
 logger = structlog.get_logger()
 
@@ -12,7 +14,7 @@ class DatabaseInitializer:
 
     def __init__(self, project_id: str):
         self.project_id = project_id
-        self.db = firestore.Client(project=project_id)
+        self.db = firestore.AsyncClient(project=project_id)
 
     async def initialize(self):
         """Initialize database"""
@@ -22,6 +24,7 @@ class DatabaseInitializer:
             await self._create_collections()
             await self._create_indexes()
             await self._seed_data()
+            await self._backfill_user_emails()
 
             logger.info("✅ Database initialization completed")
 
@@ -33,6 +36,7 @@ class DatabaseInitializer:
         """Create required collections"""
         collections = [
             "users",
+            "user_emails",
             "conversations",
             "opportunities",
             "analyses",
@@ -43,14 +47,11 @@ class DatabaseInitializer:
         for collection_name in collections:
             # Create a dummy document to ensure collection exists
             doc_ref = self.db.collection(collection_name).document("_init")
-            await asyncio.to_thread(
-                doc_ref.set,
-                {
-                    "created_at": datetime.now(),
-                    "purpose": "Collection initialization",
-                    "delete_me": True
-                }
-            )
+            await doc_ref.set({
+                "created_at": datetime.now(),
+                "purpose": "Collection initialization",
+                "delete_me": True
+            })
 
             logger.info(f"✓ Collection created: {collection_name}")
 
@@ -69,8 +70,9 @@ class DatabaseInitializer:
                 "fields": ["user_id", "last_updated"]
             },
             {
+                # get_recent_analysis: user_id ==, order by created_at DESC (created by deployment/setup.sh)
                 "collection": "analyses",
-                "fields": ["user_id", "created_at"]
+                "fields": ["user_id ASC", "created_at DESC"]
             }
         ]
 
@@ -87,13 +89,35 @@ class DatabaseInitializer:
             "version": "1.0.0"
         }
 
-        await asyncio.to_thread(
-            self.db.collection("health_check").document("status").set,
-            health_doc
-        )
+        await self.db.collection("health_check").document("status").set(health_doc)
 
         logger.info("✓ Seed data created")
 
+    async def _backfill_user_emails(self):
+        """Normalize stored emails and claim user_emails for users registered before claims existed"""
+        claimed = 0
+
+        async for doc in self.db.collection("users").stream():
+            user = doc.to_dict()
+            email = user.get("email")
+            if not email:
+                continue
+
+            normalized = normalize_email(email)
+            if normalized != email:
+                await doc.reference.update({"email": normalized})
+
+            claim_ref = self.db.collection("user_emails").document(email_claim_id(normalized))
+            try:
+                await claim_ref.create({"user_id": doc.id, "created_at": user.get("created_at") or datetime.now()})
+                claimed += 1
+            except AlreadyExists:
+                claim = await claim_ref.get()
+                if claim.to_dict().get("user_id") != doc.id:
+                    logger.warning("⚠️ Email already claimed by another user", user_id=doc.id)
+
+        logger.info(f"✓ Email claims backfilled: {claimed}")
+
 
 async def main():
     """Run database initialization"""
@@ -13,6 +13,7 @@ class Settings(BaseSettings):
     # Google Cloud
     GOOGLE_CLOUD_PROJECT: str = "avestoai-466417"
     VERTEX_AI_LOCATION: str = "us-central1"
+    VERTEX_AI_CONCURRENCY: int = 32  # Gemini requests in flight per process
     FIRESTORE_DATABASE: str = "(default)"
 
     # Authentication
@@ -81,6 +82,8 @@ class Settings(BaseSettings):
     ENABLE_REAL_TIME_STREAMING: bool = True
     ENABLE_ADVANCED_CHARTS: bool = True
     ENABLE_FI_MCP_INTEGRATION: bool = True
+    ENABLE_SEMANTIC_CACHE: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # cosine similarity for reusing a chat answer
 
     class Config:
         env_file = ".env"
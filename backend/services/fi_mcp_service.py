@@ -2,15 +2,161 @@
 import httpx
 import asyncio
 import json
+import heapq
+import logging
 import uuid
-from typing import Dict, List, Optional, Any
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Dict, List, Optional, Any, NamedTuple
 from datetime import datetime, timedelta
 import structlog
 from tenacity import retry, stop_after_attempt, wait_exponential
 from backend.models.configs import Settings
+from backend.utils.cache import get_cache, FINANCIAL_STATE_TTL
 
 logger = structlog.get_logger()
 
+# structlog filters on the stdlib logger's level; check it directly so hot paths
+# can skip building debug events entirely
+_stdlib_logger = logging.getLogger(__name__)
+
+
+# Slotted transaction records: processed rows stay compact (no per-row __dict__)
+# and are only turned into plain dicts at the API boundary.
+@dataclass(slots=True)
+class BankTx:
+    date: str
+    amount: float
+    narration: str
+    balance: float
+    category: str
+    raw_transaction: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class MFTx:
+    isin: str
+    scheme_name: str
+    date: str
+    amount: float
+    units: float
+    nav: float
+    mode: str
+    type: str
+    raw_transaction: Dict[str, Any]
+
+
+@dataclass(slots=True)
+class StockTx:
+    isin: str
+    type: str
+    date: str
+    nav: float
+    quantity: float
+    value: float
+    raw_transaction: Dict[str, Any]
+
+
+def _tx_to_dict(tx) -> Dict[str, Any]:
+    """Shallow dict view of a slotted transaction record"""
+    return {f.name: getattr(tx, f.name) for f in fields(tx)}
+
+
+# Fi MCP money values are {units, nanos}; multiply rather than divide by 1e9
+_NANOS_INV = 1e-9
+
+# Order direction -> sign applied to amounts/units when netting positions
+_MF_ORDER_SIGN = {"BUY": 1.0, "SELL": -1.0}
+_STOCK_ORDER_SIGN = {"Buy": 1.0, "Sell": -1.0}
+
+
+# Fixed key paths into MCP payloads, resolved with _dig instead of chained .get({}) calls
+_DOB_PATH = ("currentApplication", "currentApplicationDetails", "currentApplicantDetails", "dateOfBirthApplicant")
+_EMPLOYEE_SHARE_PATH = ("employee_share_total", "balance")
+_EMPLOYER_SHARE_PATH = ("employer_share_total", "balance")
+
+
+# Fixed MCP record schemas: (output key, source key, default)
+_CREDIT_ACCOUNT_SCHEMA = (
+    ("account_type", "accountType", ""),
+    ("account_status", "accountStatus", ""),
+    ("current_balance", "currentBalance", 0),
+    ("credit_limit", "creditLimit", 0),
+    ("payment_rating", "paymentRating", ""),
+    ("date_opened", "dateOpened", ""),
+    ("date_closed", "dateClosed", "")
+)
+
+
+def _parse_record(record: Dict[str, Any], schema: tuple) -> Dict[str, Any]:
+    """Project a raw MCP record onto a fixed schema in one pass"""
+    get = record.get
+    return {out_key: get(src_key, default) for out_key, src_key, default in schema}
+
+
+def _dig(data: Any, path: tuple, default: Any = None) -> Any:
+    """Walk a nested dict along a key path, returning default on any miss"""
+    for key in path:
+        if not isinstance(data, dict):
+            return default
+        data = data.get(key)
+    return default if data is None else data
+
+
+def _signed_group_totals(group_idx: List[int], signs: List[float], n_groups: int,
+                         *columns: List[float]) -> List[np.ndarray]:
+    """Net signed per-row values into per-group totals with one vectorized pass per column"""
+    n = len(group_idx)
+    idx = np.fromiter(group_idx, dtype=np.intp, count=n)
+    sign = np.fromiter(signs, dtype=np.float64, count=n)
+
+    return [
+        np.bincount(idx, weights=sign * np.fromiter(column, dtype=np.float64, count=n), minlength=n_groups)
+        for column in columns
+    ]
+
+
+def _sum_field(items: List[Dict[str, Any]], key: str) -> float:
+    """Sum one numeric field across a list of records with a single NumPy reduction"""
+    return float(np.fromiter((item.get(key, 0) for item in items), dtype=np.float64, count=len(items)).sum())
+
+
+class FinancialTotals(NamedTuple):
+    liquid_assets: float
+    total_investments: float
+    total_debt: float
+
+
+def _aggregate_totals(financial_data: Dict[str, Any]) -> FinancialTotals:
+    """Account, investment and debt totals computed once per financial snapshot"""
+    return FinancialTotals(
+        liquid_assets=_sum_field(financial_data.get("accounts", []), "balance"),
+        total_investments=_sum_field(financial_data.get("investments", []), "current_value"),
+        total_debt=_sum_field(financial_data.get("debt", []), "balance")
+    )
+
+
+def _newest_first_order(dates: List[str]) -> np.ndarray:
+    """Indices that order ISO date strings newest first, ties kept in input order"""
+    if not dates:
+        return np.empty(0, dtype=np.intp)
+
+    # Stable-sort the reversed column and map back: same result as list.sort(reverse=True)
+    last = len(dates) - 1
+    return last - np.argsort(np.array(dates[::-1], dtype=str), kind="stable")[::-1]
+
+
+def _aggregate_monthly(amounts: np.ndarray, month_idx: np.ndarray, n_months: int) -> Dict[str, np.ndarray]:
+    """Per-month income, expenses and transaction counts from amount and month-index columns"""
+    credits = amounts > 0
+
+    return {
+        "income": np.bincount(month_idx, weights=np.where(credits, amounts, 0.0), minlength=n_months),
+        "expenses": np.bincount(month_idx, weights=np.where(credits, 0.0, -amounts), minlength=n_months),
+        "transactions": np.bincount(month_idx, minlength=n_months)
+    }
+
 
 class FiMCPService:
     """Service to interact with Fi Money MCP server using proper MCP protocol"""
@@ -25,6 +171,7 @@ class FiMCPService:
         self.session_id = f"mcp-session-{uuid.uuid4()}"
         self.is_authenticated = False
         self.login_url = None
+        self._login_requests: Dict[str, httpx.Request] = {}
 
         # HTTP client configuration
         self.client = httpx.AsyncClient(
@@ -36,6 +183,12 @@ class FiMCPService:
             }
         )
 
+        # Derived financial views are cached briefly per user
+        self.cache = get_cache(settings.REDIS_URL, settings.CACHE_TTL)
+
+        # Post-fetch parsing/aggregation is CPU-bound; keep it off the event loop
+        self._cpu_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="fi-mcp-cpu")
+
         # Test phone numbers for different scenarios
         self.test_scenarios = {
             "no_assets": "1111111111",
@@ -97,26 +250,17 @@ class FiMCPService:
             # Use phone number based on user scenario
             phone_number = self.test_scenarios.get(user_scenario, "1313131313")
 
-            logger.info("🔐 Authenticating with Fi MCP", scenario=user_scenario, phone=phone_number)
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Authenticating with Fi MCP", scenario=user_scenario, phone=phone_number)
 
             # If we have a login URL, simulate the login process
             if self.login_url:
-                login_data = {
-                    "phone": phone_number,
-                    "otp": "123456"  # Any OTP works in dev server
-                }
+                login_response = await self.client.send(self._get_login_request(phone_number))
 
-                async with httpx.AsyncClient() as login_client:
-                    login_response = await login_client.post(
-                        self.login_url,
-                        data=login_data,
-                        headers={"Content-Type": "application/x-www-form-urlencoded"}
-                    )
-
-                    if login_response.status_code == 200:
-                        self.is_authenticated = True
-                        logger.info("✅ Fi MCP authentication successful")
-                        return True
+                if login_response.status_code == 200:
+                    self.is_authenticated = True
+                    logger.info("✅ Fi MCP authentication successful")
+                    return True
 
             # Try a test call to trigger authentication if needed
             await self._make_mcp_call("tools/list", {})
@@ -126,56 +270,58 @@ class FiMCPService:
             logger.error("❌ Fi MCP authentication failed", error=str(e))
             return False
 
+    def _get_login_request(self, phone_number: str) -> httpx.Request:
+        """Prebuilt login form request for a test phone number, rebuilt when the login URL changes"""
+        request = self._login_requests.get(phone_number)
+        if request is None or request.url != self.login_url:
+            request = httpx.Request(
+                "POST",
+                self.login_url,
+                data={
+                    "phone": phone_number,
+                    "otp": "123456"  # Any OTP works in dev server
+                },
+                headers={"Content-Type": "application/x-www-form-urlencoded"},
+                extensions={"timeout": httpx.Timeout(self.timeout).as_dict()}
+            )
+            self._login_requests[phone_number] = request
+        return request
+
     async def get_user_financial_data(self, user_id: str, scenario: str = "balanced") -> Dict[str, Any]:
         """Get comprehensive financial data for a user"""
         try:
-            logger.info("📊 Fetching comprehensive financial data", user_id=user_id, scenario=scenario)
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Fetching comprehensive financial data", user_id=user_id, scenario=scenario)
 
             # Ensure authentication
             await self.authenticate_user(scenario)
 
-            # Fetch all financial data in parallel
-            tasks = [
-                self._fetch_net_worth(),
-                self._fetch_credit_report(),
-                self._fetch_epf_details(),
-                self._fetch_mf_transactions(),
-                self._fetch_bank_transactions(),
-                self._fetch_stock_transactions()
-            ]
-
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
-            net_worth_data = results[0] if not isinstance(results[0], Exception) else {}
-            credit_data = results[1] if not isinstance(results[1], Exception) else {}
-            epf_data = results[2] if not isinstance(results[2], Exception) else {}
-            mf_data = results[3] if not isinstance(results[3], Exception) else {}
-            bank_data = results[4] if not isinstance(results[4], Exception) else {}
-            stock_data = results[5] if not isinstance(results[5], Exception) else {}
-
-            # Combine and structure the data
-            comprehensive_data = {
-                "user_id": user_id,
-                "scenario": scenario,
-                "net_worth": net_worth_data,
-                "credit_report": credit_data,
-                "epf_details": epf_data,
-                "mutual_funds": mf_data,
-                "bank_transactions": bank_data,
-                "stock_transactions": stock_data,
-                "accounts": self._parse_accounts_data(net_worth_data),
-                "investments": self._parse_investments_data(net_worth_data, mf_data, stock_data),
-                "debt": self._parse_debt_data(net_worth_data, credit_data),
-                "transactions": self._parse_all_transactions(bank_data, mf_data, stock_data),
-                "income": self._calculate_income_data(bank_data),
-                "expenses": self._calculate_expenses_data(bank_data),
-                "last_updated": datetime.now().isoformat()
-            }
+            # Fetch all financial data in parallel; each fetch falls back to {} on error
+            async with asyncio.TaskGroup() as tg:
+                net_worth_task = tg.create_task(self._safe_fetch("net_worth", self._fetch_net_worth()))
+                credit_task = tg.create_task(self._safe_fetch("credit_report", self._fetch_credit_report()))
+                epf_task = tg.create_task(self._safe_fetch("epf_details", self._fetch_epf_details()))
+                mf_task = tg.create_task(self._safe_fetch("mf_transactions", self._fetch_mf_transactions()))
+                bank_task = tg.create_task(self._safe_fetch("bank_transactions", self._fetch_bank_transactions()))
+                stock_task = tg.create_task(self._safe_fetch("stock_transactions", self._fetch_stock_transactions()))
+
+            net_worth_data = net_worth_task.result()
+            credit_data = credit_task.result()
+            epf_data = epf_task.result()
+            mf_data = mf_task.result()
+            bank_data = bank_task.result()
+            stock_data = stock_task.result()
+
+            # Combine and structure the data off the event loop
+            comprehensive_data = await asyncio.get_running_loop().run_in_executor(
+                self._cpu_pool, self._build_comprehensive_data, user_id, scenario,
+                net_worth_data, credit_data, epf_data, mf_data, bank_data, stock_data
+            )
 
-            logger.info("✅ Comprehensive financial data fetched successfully",
-                        user_id=user_id,
-                        net_worth=comprehensive_data.get("net_worth", {}).get("total_value", 0))
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Comprehensive financial data fetched",
+                             user_id=user_id,
+                             net_worth=comprehensive_data.get("net_worth", {}).get("total_value", 0))
 
             return comprehensive_data
 
@@ -185,6 +331,14 @@ class FiMCPService:
             # Return demo data as fallback
             return self._get_demo_comprehensive_data(user_id)
 
+    async def _safe_fetch(self, name: str, coro) -> Dict[str, Any]:
+        """Await a fetch coroutine, logging and defaulting to {} on failure"""
+        try:
+            return await coro
+        except Exception as e:
+            logger.error("❌ Fi MCP fetch failed", fetch=name, error=str(e), exc_info=True)
+            return {}
+
     async def _fetch_net_worth(self) -> Dict[str, Any]:
         """Fetch net worth data from Fi MCP"""
         try:
@@ -193,25 +347,18 @@ class FiMCPService:
             if response.get("result"):
                 net_worth_response = response["result"].get("netWorthResponse", {})
 
-                # Parse asset values
-                assets = {}
-                total_assets = 0
-                for asset in net_worth_response.get("assetValues", []):
-                    asset_type = asset.get("netWorthAttribute", "")
-                    value_data = asset.get("value", {})
-                    amount = self._parse_currency_value(value_data)
-                    assets[asset_type] = amount
-                    total_assets += amount
-
-                # Parse liability values
-                liabilities = {}
-                total_liabilities = 0
-                for liability in net_worth_response.get("liabilityValues", []):
-                    liability_type = liability.get("netWorthAttribute", "")
-                    value_data = liability.get("value", {})
-                    amount = self._parse_currency_value(value_data)
-                    liabilities[liability_type] = amount
-                    total_liabilities += amount
+                # Parse asset and liability values column-wise
+                asset_values = net_worth_response.get("assetValues", [])
+                asset_amounts = self._parse_currency_values([asset.get("value") for asset in asset_values])
+                assets = {asset.get("netWorthAttribute", ""): amount
+                          for asset, amount in zip(asset_values, asset_amounts)}
+                total_assets = sum(asset_amounts)
+
+                liability_values = net_worth_response.get("liabilityValues", [])
+                liability_amounts = self._parse_currency_values([liability.get("value") for liability in liability_values])
+                liabilities = {liability.get("netWorthAttribute", ""): amount
+                               for liability, amount in zip(liability_values, liability_amounts)}
+                total_liabilities = sum(liability_amounts)
 
                 # Total net worth
                 total_net_worth_data = net_worth_response.get("totalNetWorthValue", {})
@@ -248,27 +395,13 @@ class FiMCPService:
                     credit_score = score_data.get("bureauScore", 0)
 
                     # Extract credit accounts
-                    credit_accounts = []
-                    credit_account_data = credit_data.get("creditAccount", {})
-                    account_details = credit_account_data.get("creditAccountDetails", [])
-
-                    for account in account_details:
-                        credit_accounts.append({
-                            "account_type": account.get("accountType", ""),
-                            "account_status": account.get("accountStatus", ""),
-                            "current_balance": account.get("currentBalance", 0),
-                            "credit_limit": account.get("creditLimit", 0),
-                            "payment_rating": account.get("paymentRating", ""),
-                            "date_opened": account.get("dateOpened", ""),
-                            "date_closed": account.get("dateClosed", "")
-                        })
+                    account_details = credit_data.get("creditAccount", {}).get("creditAccountDetails", [])
+                    credit_accounts = [_parse_record(account, _CREDIT_ACCOUNT_SCHEMA) for account in account_details]
 
                     return {
                         "credit_score": credit_score,
                         "credit_accounts": credit_accounts,
-                        "date_of_birth": credit_data.get("currentApplication", {}).get("currentApplicationDetails",
-                                                                                       {}).get(
-                            "currentApplicantDetails", {}).get("dateOfBirthApplicant", ""),
+                        "date_of_birth": _dig(credit_data, _DOB_PATH, ""),
                         "raw_response": credit_data
                     }
 
@@ -294,8 +427,8 @@ class FiMCPService:
                     overall_balance = raw_details.get("overall_pf_balance", {})
 
                     current_balance = overall_balance.get("current_pf_balance", 0)
-                    employee_share = overall_balance.get("employee_share_total", {}).get("balance", 0)
-                    employer_share = overall_balance.get("employer_share_total", {}).get("balance", 0)
+                    employee_share = _dig(overall_balance, _EMPLOYEE_SHARE_PATH, 0)
+                    employer_share = _dig(overall_balance, _EMPLOYER_SHARE_PATH, 0)
 
                     epf_accounts.append({
                         "uan": account.get("uan", ""),
@@ -330,6 +463,8 @@ class FiMCPService:
 
                 processed_transactions = []
                 schemes = {}
+                scheme_index = {}
+                scheme_idx = []
 
                 for tx in transactions:
                     isin = tx.get("isinNumber", "")
@@ -341,22 +476,24 @@ class FiMCPService:
                     transaction_mode = tx.get("transactionMode", "")
                     order_type = tx.get("externalOrderType", "")
 
-                    processed_tx = {
-                        "isin": isin,
-                        "scheme_name": scheme_name,
-                        "date": transaction_date,
-                        "amount": transaction_amount,
-                        "units": transaction_units,
-                        "nav": purchase_price,
-                        "mode": transaction_mode,
-                        "type": order_type,
-                        "raw_transaction": tx
-                    }
+                    processed_tx = MFTx(
+                        isin=isin,
+                        scheme_name=scheme_name,
+                        date=transaction_date,
+                        amount=transaction_amount,
+                        units=transaction_units,
+                        nav=purchase_price,
+                        mode=transaction_mode,
+                        type=order_type,
+                        raw_transaction=tx
+                    )
 
                     processed_transactions.append(processed_tx)
 
                     # Group by scheme
-                    if isin not in schemes:
+                    idx = scheme_index.get(isin)
+                    if idx is None:
+                        idx = scheme_index[isin] = len(scheme_index)
                         schemes[isin] = {
                             "scheme_name": scheme_name,
                             "transactions": [],
@@ -365,13 +502,20 @@ class FiMCPService:
                         }
 
                     schemes[isin]["transactions"].append(processed_tx)
-
-                    if order_type == "BUY":
-                        schemes[isin]["total_invested"] += transaction_amount
-                        schemes[isin]["total_units"] += transaction_units
-                    elif order_type == "SELL":
-                        schemes[isin]["total_invested"] -= transaction_amount
-                        schemes[isin]["total_units"] -= transaction_units
+                    scheme_idx.append(idx)
+
+                # Net buys/sells per scheme in one vectorized pass
+                if processed_transactions:
+                    invested, units = _signed_group_totals(
+                        scheme_idx,
+                        [_MF_ORDER_SIGN.get(ptx.type, 0.0) for ptx in processed_transactions],
+                        len(schemes),
+                        [ptx.amount for ptx in processed_transactions],
+                        [ptx.units for ptx in processed_transactions]
+                    )
+                    for isin, idx in scheme_index.items():
+                        schemes[isin]["total_invested"] = float(invested[idx])
+                        schemes[isin]["total_units"] = float(units[idx])
 
                 return {
                     "transactions": processed_transactions,
@@ -395,56 +539,9 @@ class FiMCPService:
             if response.get("result") and response["result"].get("transactions"):
                 transactions = response["result"]["transactions"]
 
-                processed_transactions = []
-                monthly_summary = {}
-
-                for tx in transactions:
-                    amount = self._parse_currency_value(tx.get("transactionAmount", {}))
-                    narration = tx.get("narration", "")
-                    date = tx.get("transactionDate", "")
-                    balance = self._parse_currency_value(tx.get("currentBalance", {}))
-
-                    # Categorize transaction
-                    category = self._categorize_transaction(narration, amount)
-
-                    processed_tx = {
-                        "date": date,
-                        "amount": amount,
-                        "narration": narration,
-                        "balance": balance,
-                        "category": category,
-                        "raw_transaction": tx
-                    }
-
-                    processed_transactions.append(processed_tx)
-
-                    # Monthly summary
-                    try:
-                        tx_date = datetime.fromisoformat(date.replace('Z', '+00:00'))
-                        month_key = tx_date.strftime("%Y-%m")
-
-                        if month_key not in monthly_summary:
-                            monthly_summary[month_key] = {
-                                "income": 0,
-                                "expenses": 0,
-                                "transactions": 0
-                            }
-
-                        monthly_summary[month_key]["transactions"] += 1
-
-                        if amount > 0:
-                            monthly_summary[month_key]["income"] += amount
-                        else:
-                            monthly_summary[month_key]["expenses"] += abs(amount)
-                    except:
-                        pass
-
-                return {
-                    "transactions": processed_transactions,
-                    "monthly_summary": monthly_summary,
-                    "total_transactions": len(processed_transactions),
-                    "raw_response": transactions
-                }
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._cpu_pool, self._process_bank_transactions, transactions
+                )
 
             return {}
 
@@ -462,6 +559,8 @@ class FiMCPService:
 
                 processed_transactions = []
                 holdings = {}
+                holding_index = {}
+                holding_idx = []
 
                 for tx in transactions:
                     isin = tx.get("isin", "")
@@ -470,20 +569,22 @@ class FiMCPService:
                     nav_value = float(tx.get("navValue", "0"))
                     quantity = float(tx.get("quantity", "0"))
 
-                    processed_tx = {
-                        "isin": isin,
-                        "type": transaction_type,
-                        "date": transaction_date,
-                        "nav": nav_value,
-                        "quantity": quantity,
-                        "value": nav_value * quantity,
-                        "raw_transaction": tx
-                    }
+                    processed_tx = StockTx(
+                        isin=isin,
+                        type=transaction_type,
+                        date=transaction_date,
+                        nav=nav_value,
+                        quantity=quantity,
+                        value=nav_value * quantity,
+                        raw_transaction=tx
+                    )
 
                     processed_transactions.append(processed_tx)
 
                     # Track holdings
-                    if isin not in holdings:
+                    idx = holding_index.get(isin)
+                    if idx is None:
+                        idx = holding_index[isin] = len(holding_index)
                         holdings[isin] = {
                             "total_quantity": 0,
                             "total_invested": 0,
@@ -491,13 +592,20 @@ class FiMCPService:
                         }
 
                     holdings[isin]["transactions"].append(processed_tx)
-
-                    if transaction_type == "Buy":
-                        holdings[isin]["total_quantity"] += quantity
-                        holdings[isin]["total_invested"] += (nav_value * quantity)
-                    elif transaction_type == "Sell":
-                        holdings[isin]["total_quantity"] -= quantity
-                        holdings[isin]["total_invested"] -= (nav_value * quantity)
+                    holding_idx.append(idx)
+
+                # Net buys/sells per holding in one vectorized pass
+                if processed_transactions:
+                    quantities, invested = _signed_group_totals(
+                        holding_idx,
+                        [_STOCK_ORDER_SIGN.get(ptx.type, 0.0) for ptx in processed_transactions],
+                        len(holdings),
+                        [ptx.quantity for ptx in processed_transactions],
+                        [ptx.value for ptx in processed_transactions]
+                    )
+                    for isin, idx in holding_index.items():
+                        holdings[isin]["total_quantity"] = float(quantities[idx])
+                        holdings[isin]["total_invested"] = float(invested[idx])
 
                 return {
                     "transactions": processed_transactions,
@@ -512,6 +620,90 @@ class FiMCPService:
             logger.error("❌ Failed to fetch stock transactions", error=str(e))
             return {}
 
+    def _process_bank_transactions(self, transactions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Categorize bank transactions and build the monthly summary"""
+        processed_transactions = []
+        month_index = {}
+        month_idx = []
+        month_amounts = []
+
+        # Parse amount and balance columns up front instead of per row
+        amounts = self._parse_currency_values([tx.get("transactionAmount") for tx in transactions])
+        balances = self._parse_currency_values([tx.get("currentBalance") for tx in transactions])
+
+        for tx, amount, balance in zip(transactions, amounts, balances):
+            narration = tx.get("narration", "")
+            date = tx.get("transactionDate", "")
+
+            # Categorize transaction
+            category = self._categorize_transaction(narration, amount)
+
+            processed_transactions.append(BankTx(
+                date=date,
+                amount=amount,
+                narration=narration,
+                balance=balance,
+                category=category,
+                raw_transaction=tx
+            ))
+
+            # Bucket by month; rows with unparseable dates stay out of the summary
+            try:
+                month_key = datetime.fromisoformat(date.replace('Z', '+00:00')).strftime("%Y-%m")
+            except Exception:
+                continue
+
+            idx = month_index.get(month_key)
+            if idx is None:
+                idx = month_index[month_key] = len(month_index)
+            month_idx.append(idx)
+            month_amounts.append(amount)
+
+        monthly_summary = {}
+        if month_idx:
+            totals = _aggregate_monthly(
+                np.asarray(month_amounts, dtype=np.float64),
+                np.asarray(month_idx, dtype=np.intp),
+                len(month_index)
+            )
+            for month_key, idx in month_index.items():
+                monthly_summary[month_key] = {
+                    "income": float(totals["income"][idx]),
+                    "expenses": float(totals["expenses"][idx]),
+                    "transactions": int(totals["transactions"][idx])
+                }
+
+        return {
+            "transactions": processed_transactions,
+            "monthly_summary": monthly_summary,
+            "total_transactions": len(processed_transactions),
+            "raw_response": transactions
+        }
+
+    def _build_comprehensive_data(self, user_id: str, scenario: str, net_worth_data: Dict[str, Any],
+                                  credit_data: Dict[str, Any], epf_data: Dict[str, Any], mf_data: Dict[str, Any],
+                                  bank_data: Dict[str, Any], stock_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Assemble the comprehensive financial payload from fetched MCP data"""
+        monthly_rollup = self._summarize_monthly(bank_data.get("monthly_summary", {}))
+
+        return {
+            "user_id": user_id,
+            "scenario": scenario,
+            "net_worth": net_worth_data,
+            "credit_report": credit_data,
+            "epf_details": epf_data,
+            "mutual_funds": self._export_transaction_data(mf_data, "schemes"),
+            "bank_transactions": self._export_transaction_data(bank_data),
+            "stock_transactions": self._export_transaction_data(stock_data, "holdings"),
+            "accounts": self._parse_accounts_data(net_worth_data),
+            "investments": self._parse_investments_data(net_worth_data, mf_data, stock_data),
+            "debt": self._parse_debt_data(net_worth_data, credit_data),
+            "transactions": self._parse_all_transactions(bank_data, mf_data, stock_data),
+            "income": self._calculate_income_data(monthly_rollup),
+            "expenses": self._calculate_expenses_data(monthly_rollup),
+            "last_updated": datetime.now().isoformat()
+        }
+
     async def _make_mcp_call(self, method: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Make MCP protocol call to Fi server"""
         try:
@@ -556,6 +748,32 @@ class FiMCPService:
             logger.error(f"❌ MCP call failed: {method}", error=str(e))
             raise
 
+    def _export_transaction_data(self, data: Dict[str, Any], group_key: Optional[str] = None) -> Dict[str, Any]:
+        """Convert slotted transaction records in fetch results to plain dicts for serialization"""
+        if not data:
+            return data
+
+        converted = {}
+
+        def as_dicts(transactions: list) -> List[Dict[str, Any]]:
+            out = []
+            for tx in transactions:
+                tx_dict = converted.get(id(tx))
+                if tx_dict is None:
+                    tx_dict = converted[id(tx)] = _tx_to_dict(tx)
+                out.append(tx_dict)
+            return out
+
+        exported = {**data, "transactions": as_dicts(data.get("transactions", []))}
+
+        if group_key and group_key in data:
+            exported[group_key] = {
+                key: {**group, "transactions": as_dicts(group["transactions"])}
+                for key, group in data[group_key].items()
+            }
+
+        return exported
+
     def _parse_currency_value(self, value_data: Dict[str, Any]) -> float:
         """Parse Fi MCP currency value format"""
         if not value_data:
@@ -564,7 +782,15 @@ class FiMCPService:
         units = float(value_data.get("units", "0"))
         nanos = value_data.get("nanos", 0)
 
-        return units + (nanos / 1_000_000_000)
+        return units + nanos * _NANOS_INV
+
+    def _parse_currency_values(self, values: List[Optional[Dict[str, Any]]]) -> List[float]:
+        """Parse a column of Fi MCP currency values in one vectorized pass"""
+        values = [value or {} for value in values]
+        units = np.array([value.get("units", "0") for value in values], dtype=np.float64)
+        nanos = np.array([value.get("nanos", 0) for value in values], dtype=np.int64)
+
+        return (units + nanos * _NANOS_INV).tolist()
 
     def _categorize_transaction(self, narration: str, amount: float) -> str:
         """Categorize bank transaction based on narration"""
@@ -701,90 +927,93 @@ class FiMCPService:
     def _parse_all_transactions(self, bank_data: Dict[str, Any], mf_data: Dict[str, Any], stock_data: Dict[str, Any]) -> \
     List[Dict[str, Any]]:
         """Parse and combine all transactions"""
-        all_transactions = []
-
-        # Bank transactions
+        # Ids keep a running offset across sources, matching the combined list position
         bank_transactions = bank_data.get("transactions", [])
-        for tx in bank_transactions:
-            all_transactions.append({
-                "id": f"bank_{len(all_transactions)}",
-                "date": tx["date"],
-                "amount": tx["amount"],
-                "category": tx["category"],
-                "description": tx["narration"],
+        bank_out = [
+            {
+                "id": f"bank_{i}",
+                "date": tx.date,
+                "amount": tx.amount,
+                "category": tx.category,
+                "description": tx.narration,
                 "account_id": "bank_account",
                 "type": "bank"
-            })
+            }
+            for i, tx in enumerate(bank_transactions)
+        ]
 
-        # MF transactions
         mf_transactions = mf_data.get("transactions", [])
-        for tx in mf_transactions:
-            all_transactions.append({
-                "id": f"mf_{len(all_transactions)}",
-                "date": tx["date"],
-                "amount": tx["amount"] if tx["type"] == "BUY" else -tx["amount"],
+        mf_out = [
+            {
+                "id": f"mf_{i}",
+                "date": tx.date,
+                "amount": tx.amount if tx.type == "BUY" else -tx.amount,
                 "category": "investment",
-                "description": f"{tx['type']} {tx['scheme_name']}",
+                "description": f"{tx.type} {tx.scheme_name}",
                 "account_id": "mutual_fund",
                 "type": "mutual_fund"
-            })
+            }
+            for i, tx in enumerate(mf_transactions, start=len(bank_out))
+        ]
 
-        # Stock transactions
         stock_transactions = stock_data.get("transactions", [])
-        for tx in stock_transactions:
-            all_transactions.append({
-                "id": f"stock_{len(all_transactions)}",
-                "date": tx["date"],
-                "amount": tx["value"] if tx["type"] == "Buy" else -tx["value"],
+        stock_out = [
+            {
+                "id": f"stock_{i}",
+                "date": tx.date,
+                "amount": tx.value if tx.type == "Buy" else -tx.value,
                 "category": "investment",
-                "description": f"{tx['type']} Stock (ISIN: {tx['isin']})",
+                "description": f"{tx.type} Stock (ISIN: {tx.isin})",
                 "account_id": "stock_account",
                 "type": "stock"
-            })
+            }
+            for i, tx in enumerate(stock_transactions, start=len(bank_out) + len(mf_out))
+        ]
 
-        # Sort by date (newest first)
-        all_transactions.sort(key=lambda x: x["date"], reverse=True)
+        all_transactions = bank_out + mf_out + stock_out
 
-        return all_transactions
+        # Sort by date (newest first) with one argsort over the date column
+        return [all_transactions[i] for i in _newest_first_order([tx["date"] for tx in all_transactions])]
 
-    def _calculate_income_data(self, bank_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate income data from bank transactions"""
-        monthly_summary = bank_data.get("monthly_summary", {})
+    def _summarize_monthly(self, monthly_summary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Latest-month and last-6-month income/expense figures in one pass over the summary"""
+        if not monthly_summary:
+            return None
 
-        if monthly_summary:
-            # Get latest month's income
-            latest_month = max(monthly_summary.keys())
-            monthly_income = monthly_summary[latest_month]["income"]
+        # Newest six "YYYY-MM" keys without sorting the whole history
+        recent_months = heapq.nlargest(6, monthly_summary)
+        latest = monthly_summary[recent_months[0]]
 
-            # Calculate annual income (average of last 6 months)
-            recent_months = sorted(monthly_summary.keys())[-6:]
-            avg_monthly_income = sum(monthly_summary[month]["income"] for month in recent_months) / len(recent_months)
+        recent_income = 0
+        recent_expenses = 0
+        for month in reversed(recent_months):
+            recent_income += monthly_summary[month]["income"]
+            recent_expenses += monthly_summary[month]["expenses"]
 
+        return {
+            "latest_income": latest["income"],
+            "latest_expenses": latest["expenses"],
+            "avg_income": recent_income / len(recent_months),
+            "avg_expenses": recent_expenses / len(recent_months)
+        }
+
+    def _calculate_income_data(self, monthly_rollup: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Calculate income data from the bank monthly rollup"""
+        if monthly_rollup:
             return {
-                "monthly": monthly_income,
-                "annual": avg_monthly_income * 12,
+                "monthly": monthly_rollup["latest_income"],
+                "annual": monthly_rollup["avg_income"] * 12,  # Average of last 6 months
                 "trend": "stable"  # Could be calculated based on month-over-month changes
             }
 
         return {"monthly": 0, "annual": 0, "trend": "unknown"}
 
-    def _calculate_expenses_data(self, bank_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate expenses data from bank transactions"""
-        monthly_summary = bank_data.get("monthly_summary", {})
-
-        if monthly_summary:
-            # Get latest month's expenses
-            latest_month = max(monthly_summary.keys())
-            monthly_expenses = monthly_summary[latest_month]["expenses"]
-
-            # Calculate annual expenses (average of last 6 months)
-            recent_months = sorted(monthly_summary.keys())[-6:]
-            avg_monthly_expenses = sum(monthly_summary[month]["expenses"] for month in recent_months) / len(
-                recent_months)
-
+    def _calculate_expenses_data(self, monthly_rollup: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Calculate expenses data from the bank monthly rollup"""
+        if monthly_rollup:
             return {
-                "monthly": monthly_expenses,
-                "annual": avg_monthly_expenses * 12,
+                "monthly": monthly_rollup["latest_expenses"],
+                "annual": monthly_rollup["avg_expenses"] * 12,  # Average of last 6 months
                 "trend": "stable"
             }
 
@@ -808,28 +1037,36 @@ class FiMCPService:
     async def get_current_financial_state(self, user_id: str) -> Dict[str, Any]:
         """Get current financial state for decision analysis"""
         try:
+            cache_key = f"user:{user_id}:fin_state"
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             # Get full financial data
             financial_data = await self.get_user_financial_data(user_id)
 
             net_worth_data = financial_data.get("net_worth", {})
+            totals = _aggregate_totals(financial_data)
 
-            return {
+            financial_state = {
                 "net_worth": net_worth_data.get("total_value", 0),
-                "liquid_assets": sum(acc.get("balance", 0) for acc in financial_data.get("accounts", [])),
-                "total_investments": sum(inv.get("current_value", 0) for inv in financial_data.get("investments", [])),
-                "total_debt": sum(debt.get("balance", 0) for debt in financial_data.get("debt", [])),
+                "liquid_assets": totals.liquid_assets,
+                "total_investments": totals.total_investments,
+                "total_debt": totals.total_debt,
                 "monthly_income": financial_data.get("income", {}).get("monthly", 0),
                 "monthly_expenses": financial_data.get("expenses", {}).get("monthly", 0),
-                "emergency_fund_months": self._calculate_emergency_fund_months(financial_data)
+                "emergency_fund_months": self._calculate_emergency_fund_months(financial_data, totals.liquid_assets)
             }
 
+            await self.cache.set(cache_key, financial_state, FINANCIAL_STATE_TTL)
+            return financial_state
+
         except Exception as e:
             logger.error("❌ Failed to get current financial state", user_id=user_id, error=str(e))
             return {"net_worth": 0, "monthly_income": 0}
 
-    def _calculate_emergency_fund_months(self, financial_data: Dict[str, Any]) -> float:
+    def _calculate_emergency_fund_months(self, financial_data: Dict[str, Any], liquid_assets: float) -> float:
         """Calculate emergency fund coverage in months"""
-        liquid_assets = sum(acc.get("balance", 0) for acc in financial_data.get("accounts", []))
         monthly_expenses = financial_data.get("expenses", {}).get("monthly", 1)
 
         return liquid_assets / monthly_expenses if monthly_expenses > 0 else 0
@@ -857,19 +1094,28 @@ class FiMCPService:
     async def get_user_context_for_chat(self, user_id: str) -> Dict[str, Any]:
         """Get user context optimized for chat"""
         try:
+            cache_key = f"user:{user_id}:chat_context"
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
             financial_data = await self.get_user_financial_data(user_id)
+            totals = _aggregate_totals(financial_data)
 
-            return {
-                "current_balance": sum(acc.get("balance", 0) for acc in financial_data.get("accounts", [])),
+            chat_context = {
+                "current_balance": totals.liquid_assets,
                 "monthly_income": financial_data.get("income", {}).get("monthly", 0),
                 "monthly_expenses": financial_data.get("expenses", {}).get("monthly", 0),
-                "investment_value": sum(inv.get("current_value", 0) for inv in financial_data.get("investments", [])),
-                "debt_amount": sum(debt.get("balance", 0) for debt in financial_data.get("debt", [])),
+                "investment_value": totals.total_investments,
+                "debt_amount": totals.total_debt,
                 "net_worth": financial_data.get("net_worth", {}).get("total_value", 0),
-                "emergency_fund_months": self._calculate_emergency_fund_months(financial_data),
+                "emergency_fund_months": self._calculate_emergency_fund_months(financial_data, totals.liquid_assets),
                 "recent_transactions": financial_data.get("transactions", [])[:5]
             }
 
+            await self.cache.set(cache_key, chat_context, FINANCIAL_STATE_TTL)
+            return chat_context
+
         except Exception as e:
             logger.error("❌ Failed to get chat context", user_id=user_id, error=str(e))
             return {"current_balance": 0, "monthly_income": 0}
@@ -877,4 +1123,5 @@ class FiMCPService:
     async def cleanup(self):
         """Cleanup resources"""
         await self.client.aclose()
+        self._cpu_pool.shutdown(wait=False)
         logger.info("🧹 Fi MCP service cleaned up")
@@ -4,17 +4,65 @@ from google.cloud.firestore_v1.base_query import FieldFilter
 from datetime import datetime, timedelta
 import json
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence
 import structlog
 import hashlib
 import uuid
 import os
+import time
+from functools import lru_cache
 from google.oauth2 import service_account
 from backend.models.configs import Settings
+from backend.utils.cache import get_cache
 
 logger = structlog.get_logger()
 
 
+@lru_cache(maxsize=2)
+def _day_stamp(epoch_minute: int) -> str:
+    """YYYYMMDD for the given minute; history reads reuse it instead of formatting per call"""
+    return datetime.fromtimestamp(epoch_minute * 60).strftime("%Y%m%d")
+
+
+def _profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    """User document without credentials; only this form is cached"""
+    return {key: value for key, value in user.items() if key != "password_hash"}
+
+
+def normalize_email(email: str) -> str:
+    """Canonical form of an email for storage, lookups and uniqueness claims"""
+    return email.strip().lower()
+
+
+def email_claim_id(email: str) -> str:
+    """user_emails document ID claiming a (normalized) email"""
+    return hashlib.sha256(normalize_email(email).encode()).hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _get_async_client(project: str, credentials_path: Optional[str]) -> firestore.AsyncClient:
+    """Process-wide Firestore AsyncClient so every service shares one gRPC channel"""
+    if credentials_path and os.path.exists(credentials_path):
+        # Use service account file
+        credentials = service_account.Credentials.from_service_account_file(credentials_path)
+        logger.info("✅ Using service account credentials for Firestore")
+        return firestore.AsyncClient(project=project, credentials=credentials)
+
+    # Use default application credentials (from gcloud auth application-default login)
+    logger.info("✅ Using default application credentials for Firestore")
+    return firestore.AsyncClient(project=project)
+
+
+async def close_async_client(client: firestore.AsyncClient):
+    """Close the process-wide client and its gRPC channel once at application shutdown"""
+    client.close()
+    # AsyncClient.close() only releases the HTTP session; the async gRPC channel lives on the GAPIC
+    # transport, which exists only if the client has made a call
+    if client._firestore_api_internal is not None:
+        await client._firestore_api_internal.transport.close()
+    _get_async_client.cache_clear()
+
+
 class FirestoreService:
     """Service for Firestore database operations"""
 
@@ -23,30 +71,23 @@ class FirestoreService:
 
         # Initialize Firestore client with proper authentication
         try:
-            # Check if service account file exists
-            service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-            if service_account_path and os.path.exists(service_account_path):
-                # Use service account file
-                credentials = service_account.Credentials.from_service_account_file(
-                    service_account_path
-                )
-                self.db = firestore.Client(
-                    project=settings.GOOGLE_CLOUD_PROJECT,
-                    credentials=credentials
-                )
-                logger.info("✅ Using service account credentials for Firestore")
-            else:
-                # Use default application credentials (from gcloud auth application-default login)
-                self.db = firestore.Client(project=settings.GOOGLE_CLOUD_PROJECT)
-                logger.info("✅ Using default application credentials for Firestore")
+            self.db = _get_async_client(
+                settings.GOOGLE_CLOUD_PROJECT,
+                os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+            )
         except Exception as e:
             logger.error("❌ Failed to initialize Firestore client", error=str(e))
             # Fallback to default client
-            self.db = firestore.Client(project=settings.GOOGLE_CLOUD_PROJECT)
+            self.db = _get_async_client(settings.GOOGLE_CLOUD_PROJECT, None)
+
+        # Profile lookups are cached; update_user invalidates
+        self.cache = get_cache(settings.REDIS_URL, settings.CACHE_TTL)
 
         # Collection references
         self.users_collection = "users"
+        self.user_emails_collection = "user_emails"
         self.conversations_collection = "conversations"
+        self.turns_subcollection = "turns"
         self.opportunities_collection = "opportunities"
         self.analyses_collection = "analyses"
         self.goals_collection = "financial_goals"
@@ -60,7 +101,7 @@ class FirestoreService:
 
             # Test connection with a simple read
             test_doc = self.db.collection("health_check").document("test")
-            await asyncio.to_thread(test_doc.get)
+            await test_doc.get()
 
             response_time = (datetime.now() - start_time).total_seconds() * 1000
 
@@ -78,14 +119,24 @@ class FirestoreService:
                 "error": str(e)
             }
 
+    async def batch_get(self, refs: List[Any]) -> List[Any]:
+        """Fetch several document references in a single round-trip"""
+        if not refs:
+            return []
+        return [doc async for doc in self.db.get_all(refs)]
+
+    async def _run_query(self, query) -> List[Any]:
+        """Run a query and collect its results"""
+        return [doc async for doc in query.stream()]
+
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user"""
         try:
-            user_id = str(uuid.uuid4())
+            user_id = uuid.uuid4().hex
 
             user_doc = {
                 "user_id": user_id,
-                "email": user_data["email"],
+                "email": normalize_email(user_data["email"]),
                 "name": user_data["name"],
                 "age": user_data.get("age"),
                 "phone": user_data.get("phone"),
@@ -105,11 +156,15 @@ class FirestoreService:
                 }
             }
 
-            # Store in Firestore
-            await asyncio.to_thread(
-                self.db.collection(self.users_collection).document(user_id).set,
-                user_doc
+            # Create the user and claim its email atomically; create() fails if either doc exists,
+            # so concurrent registrations for one email cannot both succeed
+            batch = self.db.batch()
+            batch.create(self.db.collection(self.users_collection).document(user_id), user_doc)
+            batch.create(
+                self.db.collection(self.user_emails_collection).document(email_claim_id(user_doc["email"])),
+                {"user_id": user_id, "created_at": user_doc["created_at"]}
             )
+            await batch.commit()
 
             logger.info("✅ User created successfully", user_id=user_id)
             return user_doc
@@ -118,28 +173,72 @@ class FirestoreService:
             logger.error("❌ Failed to create user", error=str(e))
             raise
 
-    async def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        """Get user by ID"""
+    async def get_user_by_id(self, user_id: str, fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """Get a user profile (without password_hash) by ID, optionally projected to the given top-level fields"""
         try:
+            cache_key = f"user:{user_id}:profile"
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return {field: cached[field] for field in fields if field in cached} if fields else cached
+
             doc_ref = self.db.collection(self.users_collection).document(user_id)
-            doc = await asyncio.to_thread(doc_ref.get)
+
+            if fields:
+                # Field-mask read; partial documents are not cached under the full-profile key
+                doc = await doc_ref.get(field_paths=list(fields))
+                return doc.to_dict() if doc.exists else None
+
+            doc = await doc_ref.get()
 
             if doc.exists:
-                return doc.to_dict()
+                user = _profile(doc.to_dict())
+                await self.cache.set(cache_key, user)
+                return user
             return None
 
         except Exception as e:
             logger.error("❌ Failed to get user", user_id=user_id, error=str(e))
             return None
 
+    async def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get several users by ID with one batched read"""
+        try:
+            refs = [self.db.collection(self.users_collection).document(user_id) for user_id in user_ids]
+            docs = await self.batch_get(refs)
+
+            users = {user_id: None for user_id in user_ids}
+            for doc in docs:
+                if doc.exists:
+                    users[doc.id] = doc.to_dict()
+            return users
+
+        except Exception as e:
+            logger.error("❌ Failed to get users", count=len(user_ids), error=str(e))
+            return {user_id: None for user_id in user_ids}
+
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email"""
+        """Get user by email, including password_hash for authentication"""
         try:
-            query = self.db.collection(self.users_collection).where("email", "==", email)
-            docs = await asyncio.to_thread(query.stream)
+            email = normalize_email(email)
+            # Email -> user_id is stable and cached; credentials are never cached, so the document
+            # itself is a point read by ID instead of the email query
+            email_key = f"user_email:{email_claim_id(email)}"
+            user_id = await self.cache.get(email_key)
+            if user_id:
+                doc = await self.db.collection(self.users_collection).document(user_id).get()
+                if doc.exists:
+                    return doc.to_dict()
+
+            query = (self.db.collection(self.users_collection)
+                     .where(filter=FieldFilter("email", "==", email))
+                     .limit(1))
+            docs = await self._run_query(query)
 
             for doc in docs:
-                return doc.to_dict()
+                user = doc.to_dict()
+                await self.cache.set(email_key, user["user_id"])
+                await self.cache.set(f"user:{user['user_id']}:profile", _profile(user))
+                return user
             return None
 
         except Exception as e:
@@ -151,10 +250,8 @@ class FirestoreService:
         try:
             update_data["updated_at"] = datetime.now()
 
-            await asyncio.to_thread(
-                self.db.collection(self.users_collection).document(user_id).update,
-                update_data
-            )
+            await self.db.collection(self.users_collection).document(user_id).update(update_data)
+            await self.cache.delete(f"user:{user_id}:profile")
 
             logger.info("✅ User updated successfully", user_id=user_id)
             return True
@@ -166,21 +263,19 @@ class FirestoreService:
     async def store_analysis(self, user_id: str, analysis_data: Dict[str, Any]) -> str:
         """Store analysis results"""
         try:
-            analysis_id = str(uuid.uuid4())
+            # Auto-ID is minted client-side, so the ID is known without an extra round-trip
+            doc_ref = self.db.collection(self.analyses_collection).document()
+            analysis_id = doc_ref.id
+            now = datetime.now()
 
-            doc_data = {
+            await doc_ref.create({
                 "analysis_id": analysis_id,
                 "user_id": user_id,
                 "analysis_type": analysis_data.get("type", "opportunity"),
                 "data": analysis_data,
-                "created_at": datetime.now(),
-                "ttl": datetime.now() + timedelta(days=90)  # Auto-delete after 90 days
-            }
-
-            await asyncio.to_thread(
-                self.db.collection(self.analyses_collection).document(analysis_id).set,
-                doc_data
-            )
+                "created_at": now,
+                "ttl": now + timedelta(days=90)  # Auto-delete after 90 days
+            })
 
             return analysis_id
 
@@ -191,12 +286,14 @@ class FirestoreService:
     async def get_recent_analysis(self, user_id: str, limit: int = 5) -> Dict[str, Any]:
         """Get recent analysis results"""
         try:
+            # Only the analysis payload is returned; skip the bookkeeping fields on the wire
             query = (self.db.collection(self.analyses_collection)
                      .where("user_id", "==", user_id)
                      .order_by("created_at", direction=firestore.Query.DESCENDING)
+                     .select(["data"])
                      .limit(limit))
 
-            docs = await asyncio.to_thread(query.stream)
+            docs = await self._run_query(query)
 
             analyses = []
             for doc in docs:
@@ -212,78 +309,64 @@ class FirestoreService:
     async def store_conversation_turn(self, user_id: str, user_message: str, ai_response: str) -> str:
         """Store conversation turn"""
         try:
-            conversation_id = f"{user_id}_{datetime.now().strftime('%Y%m%d')}"
+            now = datetime.now()
+            conversation_id = f"{user_id}_{now.strftime('%Y%m%d')}"
+            expires_at = now + timedelta(days=30)
 
             turn_data = {
-                "timestamp": datetime.now(),
+                "timestamp": now,
                 "user_message": user_message,
                 "ai_response": ai_response,
-                "message_id": str(uuid.uuid4())
+                "message_id": uuid.uuid4().hex,
+                "ttl": expires_at  # Subcollection docs outlive their parent
             }
 
-            # Update or create conversation document
+            # Upsert the conversation document and append the turn in one commit; each turn is its
+            # own document, so appending never rewrites earlier turns
             doc_ref = self.db.collection(self.conversations_collection).document(conversation_id)
+            turn_ref = doc_ref.collection(self.turns_subcollection).document(turn_data["message_id"])
 
-            await asyncio.to_thread(
-                doc_ref.update,
-                {
-                    "turns": firestore.ArrayUnion([turn_data]),
-                    "last_updated": datetime.now(),
-                    "user_id": user_id
-                }
-            )
+            batch = self.db.batch()
+            batch.set(doc_ref, {
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "last_updated": now,
+                "ttl": expires_at
+            }, merge=True)
+            batch.set(turn_ref, turn_data)
+            await batch.commit()
 
             return conversation_id
 
         except Exception as e:
-            # If document doesn't exist, create it
-            try:
-                conversation_doc = {
-                    "conversation_id": conversation_id,
-                    "user_id": user_id,
-                    "created_at": datetime.now(),
-                    "last_updated": datetime.now(),
-                    "turns": [turn_data],
-                    "ttl": datetime.now() + timedelta(days=30)
-                }
-
-                await asyncio.to_thread(
-                    doc_ref.set,
-                    conversation_doc
-                )
-
-                return conversation_id
-
-            except Exception as create_error:
-                logger.error("❌ Failed to store conversation",
-                             user_id=user_id, error=str(create_error))
-                return ""
+            logger.error("❌ Failed to store conversation",
+                         user_id=user_id, error=str(e))
+            return ""
 
     async def get_conversation_history(self, user_id: str, limit: int = 10) -> List[Dict[str, str]]:
         """Get conversation history"""
         try:
-            conversation_id = f"{user_id}_{datetime.now().strftime('%Y%m%d')}"
+            conversation_id = f"{user_id}_{_day_stamp(int(time.time() // 60))}"
 
             doc_ref = self.db.collection(self.conversations_collection).document(conversation_id)
-            doc = await asyncio.to_thread(doc_ref.get)
 
-            if doc.exists:
-                data = doc.to_dict()
-                turns = data.get("turns", [])
-
-                # Return last N turns
-                recent_turns = turns[-limit:] if len(turns) > limit else turns
+            # Newest N turns, returned oldest first; only the fields the history needs
+            turns_query = (doc_ref.collection(self.turns_subcollection)
+                           .order_by("timestamp", direction=firestore.Query.DESCENDING)
+                           .select(["user_message", "ai_response", "timestamp"])
+                           .limit(limit))
+            docs = await self._run_query(turns_query)
 
-                return [
-                    {
-                        "user": turn["user_message"],
-                        "ai": turn["ai_response"],
-                        "timestamp": turn["timestamp"]
-                    }
-                    for turn in recent_turns
-                ]
+            recent_turns = [doc.to_dict() for doc in reversed(docs)]
 
-            return []
+            return [
+                {
+                    "user": turn["user_message"],
+                    "ai": turn["ai_response"],
+                    "timestamp": turn["timestamp"]
+                }
+                for turn in recent_turns
+            ]
 
         except Exception as e:
             logger.error("❌ Failed to get conversation history",
@@ -291,5 +374,5 @@ class FirestoreService:
             return []
 
     async def cleanup(self):
-        """Cleanup resources"""
+        """Cleanup resources; the shared client is closed by close_async_client at shutdown"""
         logger.info("🧹 Firestore service cleaned up")
@@ -1,31 +1,174 @@
 # backend/services/on_device_ai.py
 import asyncio
+import copy
+import functools
 import json
 import numpy as np
+from hashlib import blake2b
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
+from cachetools import LRUCache
 import ollama
 import subprocess
 import os
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+# Explicitly quantized Gemma tags: Q4_K_M keeps ~99% of quality at a quarter of the BF16 size
+# (interactive scoring); Q8_0 is near-lossless for the privacy analysis where accuracy matters more
+DEFAULT_FAST_MODEL = "gemma:2b-instruct-q4_K_M"
+DEFAULT_ACCURATE_MODEL = "gemma:2b-instruct-q8_0"
+
+# Unquantized weights fall back to slow CPU paths on most edge devices
+UNQUANTIZED_LEVELS = {"BF16", "F16", "F32"}
+
+# Ollama server settings: flash attention plus a Q8_0 KV cache roughly halves KV memory on Gemma.
+# They are read when `ollama serve` starts, so they only apply to a server launched with this environment.
+OLLAMA_SERVER_ENV = {
+    "OLLAMA_FLASH_ATTENTION": "1",
+    "OLLAMA_KV_CACHE_TYPE": "q8_0"
+}
+
+# Quick-score taps arriving within this window share one local generation
+QUICK_SCORE_BATCH_WINDOW = 0.02  # seconds
+QUICK_SCORE_MAX_BATCH = 8
+
+# Context window sizing: Ollama's default window allocates KV cache far beyond what short prompts need
+MIN_CTX_SIZE = 256
+MAX_CTX_SIZE = 4096
+QUICK_SCORE_CTX_SIZE = 512
+PROMPT_BATCH_SIZE = 512
+
+# Ollama unloads idle models after 5 minutes by default; keep them resident between user requests
+# and ping them well inside that window so quiet periods don't end in a multi-second cold load
+MODEL_KEEP_ALIVE = "30m"
+KEEPALIVE_PING_INTERVAL = 20 * 60  # seconds
+
+# Rule-based fallback scoring table: category adjustments on top of a base score of 50
+FALLBACK_CATEGORY_DELTA = {
+    "investment": 20, "education": 20, "health": 20,
+    "entertainment": -15, "luxury": -15
+}
+
+
+def _dumps(obj, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize prompt data to JSON text, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=str, option=option).decode()
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, default=str)
+
+
+# Prompt skeletons are built once; only the dynamic slots are filled per request
+SENSITIVE_ANALYSIS_PROMPT = """
+Analyze this financial data privately and create an anonymized profile.
+Keep all personal details local, only output aggregate patterns.
+
+Financial Data: {financial_data}
+
+Create anonymized profile with:
+- Spending patterns (categories and trends)
+- Income stability score
+- Risk profile
+- Financial discipline score
+
+Output only anonymized aggregates, no personal details.
+Format as JSON.
+"""
+
+QUICK_SCORE_PROMPT = """
+Quick financial decision scoring (respond in <2 seconds):
+
+Purchase: ₹{amount:,} for {category}
+Context: {context}
+
+Provide immediate score (0-100) with brief reasoning.
+Format: {{"score": 75, "reasoning": "Brief explanation"}}
+"""
+
+QUICK_SCORE_BATCH_PROMPT = """
+Quick financial decision scoring (respond in <2 seconds):
+
+Purchases: {purchases}
+
+Provide an immediate score (0-100) with brief reasoning for each purchase, in the same order.
+Format as a JSON array: [{{"score": 75, "reasoning": "Brief explanation"}}, ...]
+"""
+
+HEALTH_SCORE_PROMPT = """
+Calculate financial health score based on these metrics:
+{metrics}
+
+Provide:
+- Overall health score (0-100)
+- Key strengths
+- Risk areas
+- Trend analysis
+
+Keep response under 200 tokens for speed.
+"""
+
+# Model replies often wrap JSON in prose; raw_decode parses from an offset and stops where the value ends
+_JSON_DECODER = json.JSONDecoder()
+
 
 class OnDeviceAI:
     def __init__(self):
-        self.model_name = "gemma:2b"  # Lightweight model for on-device
+        # Export server tuning before any Ollama call, without overriding explicit settings
+        self._server_env_defaults = [key for key in OLLAMA_SERVER_ENV if key not in os.environ]
+        for key, value in OLLAMA_SERVER_ENV.items():
+            os.environ.setdefault(key, value)
+
+        self.fast_model = os.getenv("ON_DEVICE_FAST_MODEL", DEFAULT_FAST_MODEL)
+        self.accurate_model = os.getenv("ON_DEVICE_ACCURATE_MODEL", DEFAULT_ACCURATE_MODEL)
+        self.model_name = self.fast_model  # Default for generation
         self.model_loaded = False
-        self.cache = {}
+        self.cache = LRUCache(maxsize=1024)  # prompt hash -> generated text
+        self.score_cache = LRUCache(maxsize=1024)  # (category, amount, context hash) -> score
+        # The local model is a single instance that serializes requests anyway; one dedicated worker
+        # keeps Ollama calls off the shared default executor and bounds thread growth under load
+        self._ollama_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ollama")
+        # Micro-batcher for quick_decision_score, started lazily in the running loop
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_task: Optional[asyncio.Task] = None
+        self._batch_loop = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking Ollama/subprocess call on the dedicated worker"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._ollama_pool, functools.partial(func, *args, **kwargs))
 
     async def initialize_model(self):
         """Initialize Gemma model locally using Ollama"""
         try:
-            # Check if Ollama is installed
-            subprocess.run(["ollama", "--version"], check=True, capture_output=True)
-
-            # Pull Gemma model if not already available
-            await asyncio.to_thread(
-                subprocess.run,
-                ["ollama", "pull", self.model_name],
-                check=True
-            )
+            # Check the Ollama server is reachable and see which models are already local
+            local_models = {m.model for m in (await self._run_blocking(ollama.list)).models}
+            if self._server_env_defaults:
+                print(f"⚠️ Ollama server already running; {', '.join(self._server_env_defaults)} "
+                      f"only take effect when it is restarted with this environment")
+
+            # Pull Gemma models only if not already available and make sure they are quantized
+            for model in dict.fromkeys([self.fast_model, self.accurate_model]):
+                if model not in local_models:
+                    await self._run_blocking(
+                        subprocess.run,
+                        ["ollama", "pull", model],
+                        check=True
+                    )
+
+                model_info = await self._run_blocking(ollama.show, model)
+                quantization = (model_info["details"]["quantization_level"] or "").upper()
+                if quantization in UNQUANTIZED_LEVELS:
+                    raise Exception(f"{model} is not quantized ({quantization})")
 
             # Test model
             test_response = await self._generate_local(
@@ -34,7 +177,8 @@ class OnDeviceAI:
 
             if "successfully" in test_response.lower():
                 self.model_loaded = True
-                print(f"✅ {self.model_name} loaded successfully on-device")
+                self._keepalive_task = asyncio.create_task(self._keep_models_warm())
+                print(f"✅ {self.fast_model} / {self.accurate_model} loaded successfully on-device")
             else:
                 raise Exception("Model test failed")
 
@@ -50,24 +194,10 @@ class OnDeviceAI:
             return self._fallback_local_analysis(user_data)
 
         # Create anonymized profile locally
-        prompt = f"""
-        Analyze this financial data privately and create an anonymized profile.
-        Keep all personal details local, only output aggregate patterns.
-
-        Financial Data: {json.dumps(user_data, indent=2)}
-
-        Create anonymized profile with:
-        - Spending patterns (categories and trends)
-        - Income stability score
-        - Risk profile
-        - Financial discipline score
-
-        Output only anonymized aggregates, no personal details.
-        Format as JSON.
-        """
+        prompt = SENSITIVE_ANALYSIS_PROMPT.format(financial_data=_dumps(user_data, indent=True))
 
         try:
-            response = await self._generate_local(prompt)
+            response = await self._generate_local(prompt, model=self.accurate_model)
             return self._parse_local_response(response)
         except:
             return self._fallback_local_analysis(user_data)
@@ -78,21 +208,64 @@ class OnDeviceAI:
         if not self.model_loaded:
             return self._fallback_quick_score(amount, category)
 
-        prompt = f"""
-        Quick financial decision scoring (respond in <2 seconds):
-
-        Purchase: ₹{amount:,} for {category}
-        Context: {json.dumps(user_context)}
-
-        Provide immediate score (0-100) with brief reasoning.
-        Format: {{"score": 75, "reasoning": "Brief explanation"}}
-        """
-
+        # Repeat purchases share a score; the key uses the exact amount because the reasoning may quote it
+        score_key = (category, amount, self._prompt_key(_dumps(user_context, sort_keys=True)))
+        cached_score = self.score_cache.get(score_key)
+        if cached_score is not None:
+            return copy.deepcopy(cached_score)
+
+        # Coalesce concurrent taps into a single local generation
+        future = asyncio.get_running_loop().create_future()
+        await self._get_batch_queue().put((amount, category, user_context, score_key, future))
+        return await future
+
+    def _get_batch_queue(self) -> asyncio.Queue:
+        """Queue feeding the quick-score batcher, (re)started in the running loop"""
+        loop = asyncio.get_running_loop()
+        if self._batch_task is None or self._batch_task.done() or self._batch_loop is not loop:
+            self._batch_queue = asyncio.Queue()
+            self._batch_loop = loop
+            self._batch_task = loop.create_task(self._quick_score_batcher(self._batch_queue))
+        return self._batch_queue
+
+    async def _quick_score_batcher(self, queue: asyncio.Queue):
+        """Drain quick-score requests arriving within a short window and score them together"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + QUICK_SCORE_BATCH_WINDOW
+            while len(batch) < QUICK_SCORE_MAX_BATCH:
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=max(0, deadline - loop.time())))
+                except asyncio.TimeoutError:
+                    break
+            await self._score_batch(batch)
+
+    async def _score_batch(self, batch: list):
+        """Score queued purchases with one local generation and resolve their futures"""
         try:
-            response = await self._generate_local(prompt, max_tokens=100)
-            return self._parse_local_response(response)
-        except:
-            return self._fallback_quick_score(amount, category)
+            if len(batch) == 1:
+                amount, category, user_context, _, _ = batch[0]
+                prompt = QUICK_SCORE_PROMPT.format(amount=amount, category=category, context=_dumps(user_context))
+                response = await self._generate_local(prompt, max_tokens=100, ctx_size=QUICK_SCORE_CTX_SIZE)
+                scores = [self._parse_local_response(response)]
+            else:
+                purchases = [
+                    {"amount": amount, "category": category, "context": user_context}
+                    for amount, category, user_context, _, _ in batch
+                ]
+                prompt = QUICK_SCORE_BATCH_PROMPT.format(purchases=_dumps(purchases))
+                response = await self._generate_local(prompt, max_tokens=100 * len(batch))
+                scores = self._parse_local_array(response, len(batch))
+
+            for (_, _, _, score_key, _), score in zip(batch, scores):
+                self.score_cache[score_key] = copy.deepcopy(score)
+        except Exception:
+            scores = [self._fallback_quick_score(amount, category) for amount, category, _, _, _ in batch]
+
+        for (_, _, _, _, future), score in zip(batch, scores):
+            if not future.done():
+                future.set_result(score)
 
     async def calculate_health_score(self, current_data: dict) -> dict:
         """Real-time financial health calculation"""
@@ -104,18 +277,7 @@ class OnDeviceAI:
             return health_metrics
 
         # Enhance with AI insights
-        prompt = f"""
-        Calculate financial health score based on these metrics:
-        {json.dumps(health_metrics)}
-
-        Provide:
-        - Overall health score (0-100)
-        - Key strengths
-        - Risk areas
-        - Trend analysis
-
-        Keep response under 200 tokens for speed.
-        """
+        prompt = HEALTH_SCORE_PROMPT.format(metrics=_dumps(health_metrics))
 
         try:
             ai_analysis = await self._generate_local(prompt, max_tokens=200)
@@ -134,76 +296,119 @@ class OnDeviceAI:
         if not transactions:
             return anomalies
 
-        # Calculate spending baseline
-        daily_amounts = []
-        for transaction in transactions[-30:]:  # Last 30 transactions
-            if transaction.get('amount', 0) < 0:  # Expenses
-                daily_amounts.append(abs(transaction['amount']))
+        # Calculate spending baseline from the last 30 transactions in one array
+        window = transactions[-30:]
+        amounts = np.fromiter((t.get('amount', 0) for t in window), dtype=np.float64, count=len(window))
+        daily_amounts = -amounts[amounts < 0]  # Expenses
 
         if len(daily_amounts) < 5:
             return anomalies
 
-        avg_spending = np.mean(daily_amounts)
-        std_spending = np.std(daily_amounts)
+        avg_spending = daily_amounts.mean()
+        std_spending = daily_amounts.std()
 
-        # Check recent transactions for anomalies
-        recent_transactions = transactions[-5:]  # Last 5 transactions
+        # Check the last 5 transactions against the 2-sigma threshold in one comparison
+        recent_transactions = transactions[-5:]
+        recent_amounts = np.abs(amounts[-len(recent_transactions):])
+        flagged = np.flatnonzero(recent_amounts > avg_spending + (2 * std_spending))
 
-        for transaction in recent_transactions:
+        for i in flagged:
+            transaction = recent_transactions[i]
             amount = abs(transaction.get('amount', 0))
-            if amount > avg_spending + (2 * std_spending):  # 2 standard deviations
-                anomalies.append({
-                    "type": "high_spending",
-                    "amount": amount,
-                    "description": f"Unusual expense: ₹{amount:,}",
-                    "severity": "medium" if amount < avg_spending + (3 * std_spending) else "high",
-                    "timestamp": transaction.get('date'),
-                    "suggestion": "Review this expense and consider if it aligns with your financial goals"
-                })
+            anomalies.append({
+                "type": "high_spending",
+                "amount": amount,
+                "description": f"Unusual expense: ₹{amount:,}",
+                "severity": "medium" if amount < avg_spending + (3 * std_spending) else "high",
+                "timestamp": transaction.get('date'),
+                "suggestion": "Review this expense and consider if it aligns with your financial goals"
+            })
 
         return anomalies
 
-    async def _generate_local(self, prompt: str, max_tokens: int = 512) -> str:
+    async def _generate_local(self, prompt: str, max_tokens: int = 512, model: Optional[str] = None,
+                              ctx_size: Optional[int] = None) -> str:
         """Generate response using local Ollama"""
+        model = model or self.model_name
+        ctx_size = ctx_size or self._estimate_ctx_size(prompt, max_tokens)
+        key = self._prompt_key(f"{model}:{max_tokens}:{prompt}")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
         try:
-            response = await asyncio.to_thread(
+            response = await self._run_blocking(
                 ollama.generate,
-                model=self.model_name,
+                model=model,
                 prompt=prompt,
-                options={"num_predict": max_tokens, "temperature": 0.3}
+                options={
+                    "num_predict": max_tokens,
+                    "temperature": 0.3,
+                    "num_ctx": ctx_size,
+                    "num_batch": PROMPT_BATCH_SIZE
+                },
+                keep_alive=MODEL_KEEP_ALIVE
             )
+            self.cache[key] = response['response']
             return response['response']
         except Exception as e:
             raise Exception(f"Local generation failed: {e}")
 
+    async def _keep_models_warm(self):
+        """Periodically reload both models so Ollama never evicts them while the service is up"""
+        while True:
+            await asyncio.sleep(KEEPALIVE_PING_INTERVAL)
+            for model in dict.fromkeys([self.fast_model, self.accurate_model]):
+                try:
+                    # An empty prompt only loads the model and refreshes its keep-alive; it bypasses the prompt cache
+                    await self._run_blocking(ollama.generate, model=model, prompt="", keep_alive=MODEL_KEEP_ALIVE)
+                except Exception as e:
+                    print(f"⚠️ Keep-alive ping for {model} failed: {e}")
+
+    def _estimate_ctx_size(self, prompt: str, max_tokens: int) -> int:
+        """Smallest power-of-two context window that fits the prompt (~3 chars/token) plus the reply"""
+        needed = len(prompt) // 3 + max_tokens + 64
+        return min(MAX_CTX_SIZE, max(MIN_CTX_SIZE, 1 << (needed - 1).bit_length()))
+
+    def _prompt_key(self, text: str) -> str:
+        """Short stable hash used as a cache key"""
+        return blake2b(text.encode(), digest_size=16).hexdigest()
+
     def _parse_local_response(self, response: str) -> dict:
         """Parse JSON response from local model"""
         try:
-            # Find JSON in response
+            # Decode the first JSON object in the response, ignoring anything after it
             start = response.find('{')
-            end = response.rfind('}') + 1
-            if start >= 0 and end > start:
-                json_str = response[start:end]
-                return json.loads(json_str)
+            if start >= 0:
+                parsed, _ = _JSON_DECODER.raw_decode(response, start)
+                return parsed
             else:
                 # If no JSON found, create structured response
                 return {"response": response, "parsed": False}
         except:
             return {"response": response, "parsed": False}
 
+    def _parse_local_array(self, response: str, expected: int) -> List[dict]:
+        """Parse a JSON array with one result per batched item from the local model"""
+        start = response.find('[')
+        items = _JSON_DECODER.raw_decode(response, start)[0] if start >= 0 else None
+        if not isinstance(items, list) or len(items) != expected or not all(isinstance(i, dict) for i in items):
+            raise ValueError("Batched response does not match the queued requests")
+        return items
+
     def _calculate_basic_health_metrics(self, data: dict) -> dict:
         """Basic financial health calculation without AI"""
         accounts = data.get('accounts', {})
         transactions = data.get('transactions', [])
 
         # Calculate basic metrics
-        total_assets = sum(accounts.get('savings', 0), accounts.get('checking', 0))
+        total_assets = accounts.get('savings', 0) + accounts.get('checking', 0)
         total_debt = accounts.get('credit_used', 0)
         net_worth = total_assets - total_debt
 
         # Spending analysis
-        monthly_expenses = sum(abs(t.get('amount', 0)) for t in transactions
-                               if t.get('amount', 0) < 0)
+        amounts = np.fromiter((t.get('amount', 0) for t in transactions), dtype=np.float64, count=len(transactions))
+        monthly_expenses = float(-amounts[amounts < 0].sum())
 
         # Simple health score calculation
         debt_ratio = total_debt / (total_assets + 1) if total_assets > 0 else 1
@@ -235,21 +440,19 @@ class OnDeviceAI:
 
     def _fallback_quick_score(self, amount: int, category: str) -> dict:
         """Fallback quick scoring"""
-        # Simple rule-based scoring
-        score = 50  # Base score
-
-        if category in ["investment", "education", "health"]:
-            score += 20
-        elif category in ["entertainment", "luxury"]:
-            score -= 15
-
-        if amount > 50000:
-            score -= 10
-        elif amount < 5000:
-            score += 10
+        # Simple rule-based scoring: table lookup for category, +10 below ₹5k and -10 above ₹50k
+        score = 50 + FALLBACK_CATEGORY_DELTA.get(category, 0) + 10 * ((amount < 5000) - (amount > 50000))
 
         return {
             "score": max(0, min(100, score)),
             "reasoning": f"Quick assessment for ₹{amount:,} {category} purchase",
             "processing_mode": "fallback"
         }
+
+    async def cleanup(self):
+        """Stop the background tasks and release the Ollama worker thread"""
+        for task in (self._batch_task, self._keepalive_task):
+            if task is not None:
+                task.cancel()
+        self._ollama_pool.shutdown(wait=False)
+        print("🧹 On-device AI cleaned up")
@@ -1,15 +1,400 @@
 # backend/services/opportunity_engine.py
-from datetime import datetime, timedelta
+import asyncio
+import copy
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from hashlib import blake2b
+import heapq
 import json
+import logging
 import numpy as np
-from typing import List, Dict, Optional, Any
+from operator import attrgetter
+import uuid
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import structlog
+from cachetools import TTLCache
 from backend.services.vertex_ai_service import VertexAIService
 from backend.services.firestore_service import FirestoreService
 from backend.services.fi_mcp_service import FiMCPService
+from backend.utils.cache import stable_fields
 
 logger = structlog.get_logger()
 
+# Level gate for per-request debug events
+_stdlib_logger = logging.getLogger(__name__)
+
+# Repeated dashboard loads with unchanged user data are served from memory for a few minutes
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL = 300
+
+
+# Static lookup tables, built once at import rather than per call
+MARKET_CONTEXT = {
+    "interest_rates": {"repo_rate": 6.5, "fd_rates": "6.5-7.5%"},
+    "inflation": 4.2,
+    "market_trend": "volatile",
+    "recommendation": "Focus on diversification and emergency fund"
+}
+
+OPTIMIZATION_STRATEGIES = {
+    "food": {
+        "percentage": 25,
+        "method": "meal planning and cooking at home",
+        "effort": "medium",
+        "timeline": "1 month",
+        "confidence": 0.75,
+        "action_steps": [
+            "Plan weekly meals and create shopping lists",
+            "Cook at home 4-5 days per week",
+            "Use food delivery apps mindfully",
+            "Buy groceries in bulk for non-perishables"
+        ]
+    },
+    "transport": {
+        "percentage": 20,
+        "method": "public transport and ride optimization",
+        "effort": "low",
+        "timeline": "2 weeks",
+        "confidence": 0.8,
+        "action_steps": [
+            "Use public transport for daily commute",
+            "Combine errands into single trips",
+            "Consider carpooling options",
+            "Walk or cycle for short distances"
+        ]
+    },
+    "entertainment": {
+        "percentage": 30,
+        "method": "budget allocation and free alternatives",
+        "effort": "low",
+        "timeline": "1 month",
+        "confidence": 0.85,
+        "action_steps": [
+            "Set monthly entertainment budget",
+            "Explore free events and activities",
+            "Use discount apps and offers",
+            "Limit expensive outings to special occasions"
+        ]
+    },
+    "shopping": {
+        "percentage": 35,
+        "method": "planned purchases and comparison shopping",
+        "effort": "medium",
+        "timeline": "2 months",
+        "confidence": 0.7,
+        "action_steps": [
+            "Create shopping lists and stick to them",
+            "Compare prices across platforms",
+            "Wait 24 hours before impulse purchases",
+            "Use cashback and reward programs"
+        ]
+    }
+}
+
+DEFAULT_OPTIMIZATION_STRATEGY = {
+    "percentage": 15,
+    "method": "mindful spending and budgeting",
+    "effort": "medium",
+    "timeline": "1-2 months",
+    "confidence": 0.6,
+    "action_steps": ["Track expenses", "Set category budget", "Review monthly"]
+}
+
+# Strategies keyed by lowercase category with the display title precomputed
+CATEGORY_INFO = {category: {**strategy, "title": category.title()} for category, strategy in OPTIMIZATION_STRATEGIES.items()}
+
+
+# Composite score multipliers as lookup tables indexed by effort/priority code
+EFFORT_CODES = {"low": 0, "medium": 1, "high": 2}
+EFFORT_LUT = np.array([1.0, 0.8, 0.6])
+PRIORITY_CODES = {"urgent": 0, "high": 1, "medium": 2, "low": 3}
+PRIORITY_LUT = np.array([1.2, 1.0, 0.8, 0.6])
+
+
+def composite_scores(values: np.ndarray, confidences: np.ndarray, effort_codes: np.ndarray,
+                     priority_codes: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Composite score kernel over arrays of any matching shape, e.g. stacked (n_users, n_opps) batches"""
+    out = np.minimum(values / 10000, 10, out=out)
+    out += confidences * 10
+    out *= EFFORT_LUT[effort_codes]
+    out *= PRIORITY_LUT[priority_codes]
+    return out
+
+
+@lru_cache(maxsize=64)
+def _sip_growth_factor(months: int, monthly_return: float) -> float:
+    """Future value of ₹1/month invested at the start of each month; depends only on horizon and rate"""
+    growth = 1 + monthly_return
+    return ((growth ** months - 1) / monthly_return) * growth
+
+
+@lru_cache(maxsize=8192)
+def _parse_iso_date(value: str) -> np.datetime64:
+    """Parse one ISO date the way the bulk datetime64 path does (UTC for aware values), or NaT"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return np.datetime64("NaT")
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return np.datetime64(parsed, "s")
+
+
+def _parse_date_or_nat(value: Any) -> np.datetime64:
+    """Memoized per-row date parse; transaction histories repeat the same dates many times"""
+    return _parse_iso_date(value) if isinstance(value, str) else np.datetime64("NaT")
+
+
+def _as_number(value: Any, default: float = 0.0) -> float:
+    """Numeric value of an amount or balance field; malformed values (e.g. "abc", dicts) become default"""
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@dataclass(slots=True)
+class Aggregates:
+    """Figures shared by the opportunity analyzers, derived from user_data in one pass"""
+    spending_by_category: Dict[str, float]
+    monthly_expenses: float
+    total_savings: float
+    total_liquid: float
+    total_investments: float
+    tax_saver_investments: float
+    annual_income: float
+    age: int
+    debt_accounts: List[Dict[str, Any]]
+    has_accounts: bool
+    has_investments: bool
+    has_transactions: bool
+
+
+@dataclass(slots=True)
+class Opportunity:
+    """A detected opportunity; exported as a plain dict only at the service boundary"""
+    id: str
+    type: str
+    priority: str
+    title: str
+    description: str
+    potential_annual_value: float
+    effort_level: str
+    time_to_implement: str
+    confidence_score: float
+    risk_level: str
+    category: str
+    action_steps: Optional[List[str]] = None
+    financial_impact: Optional[Dict[str, Any]] = None
+    prerequisites: Optional[List[Any]] = None
+    timeline_milestones: Optional[List[Dict[str, str]]] = None
+    composite_score: Optional[float] = None
+
+
+def _opportunity_to_dict(opp: Opportunity) -> Dict[str, Any]:
+    """Dict view of an opportunity, leaving out optional fields that were never set"""
+    return {f.name: value for f in fields(opp) if (value := getattr(opp, f.name)) is not None}
+
+
+@dataclass(frozen=True, slots=True)
+class OpportunityRule:
+    """Threshold rule: build an opportunity when metric_fn(agg) exceeds threshold"""
+    rule_id: str
+    metric_fn: Callable[[Aggregates], float]
+    threshold: float
+    build: Callable[[float, Aggregates], Opportunity]
+
+
+SAVINGS_ACTION_STEPS = [
+    "Research FDIC-insured high-yield savings accounts",
+    "Compare rates from digital banks (Marcus, Ally, etc.)",
+    "Open new account online",
+    "Transfer funds and update auto-payments"
+]
+
+SAVINGS_MILESTONES = [
+    {"milestone": "Research and compare", "timeline": "Day 1"},
+    {"milestone": "Open account", "timeline": "Day 2"},
+    {"milestone": "Transfer funds", "timeline": "Day 3"}
+]
+
+
+def _build_savings_optimization(annual_gain: float, agg: Aggregates) -> Opportunity:
+    """High-yield savings opportunity"""
+    return Opportunity(
+        id=f"savings_opt_{uuid.uuid4().hex}",
+        type="savings_optimization",
+        priority="high" if annual_gain > 15000 else "medium",
+        title="High-Yield Savings Optimization",
+        description=f"Move ₹{agg.total_savings:,.0f} to high-yield savings account earning 7.5% instead of 3.5%",
+        potential_annual_value=annual_gain,
+        effort_level="low",
+        time_to_implement="1-2 days",
+        confidence_score=0.95,
+        risk_level="very_low",
+        category="immediate_gain",
+        action_steps=SAVINGS_ACTION_STEPS,
+        financial_impact={
+            "monthly_gain": annual_gain / 12,
+            "5_year_value": annual_gain * 5.5,  # With compounding
+            "implementation_cost": 0
+        },
+        prerequisites=[],
+        timeline_milestones=SAVINGS_MILESTONES
+    )
+
+
+def _build_emergency_fund(shortage: float, agg: Aggregates) -> Opportunity:
+    """Emergency fund gap against 6 months of expenses"""
+    return Opportunity(
+        id=f"emergency_fund_{uuid.uuid4().hex}",
+        type="risk_mitigation",
+        priority="medium" if shortage < 100000 else "high",
+        title=f"Emergency Fund Gap: ₹{shortage:,.0f}",
+        description=f"Build emergency fund to 6 months of expenses (₹{agg.monthly_expenses * 6:,.0f})",
+        potential_annual_value=shortage * 0.1,  # Peace of mind value
+        effort_level="medium",
+        time_to_implement="6-12 months",
+        confidence_score=0.9,
+        risk_level="low",
+        category="financial_security"
+    )
+
+
+def _build_sip_optimization(additional_sip: float, agg: Aggregates) -> Opportunity:
+    """Raise monthly SIP towards 20% of income"""
+    projected_returns = additional_sip * _sip_growth_factor(10 * 12, 0.12 / 12)
+    return Opportunity(
+        id=f"sip_optimization_{uuid.uuid4().hex}",
+        type="investment_growth",
+        priority="high",
+        title=f"Increase SIP by ₹{additional_sip:,.0f}/month",
+        description=f"Optimal SIP based on your income. Projected 10-year value: ₹{projected_returns:,.0f}",
+        potential_annual_value=additional_sip * 12 * 0.12,
+        effort_level="low",
+        time_to_implement="1 week",
+        confidence_score=0.85,
+        risk_level="medium",
+        category="wealth_building",
+        financial_impact={
+            "10_year_corpus": projected_returns,
+            "monthly_investment": additional_sip,
+            "expected_annual_return": 0.12
+        }
+    )
+
+
+def _build_asset_rebalancing(excess_liquid: float, agg: Aggregates) -> Opportunity:
+    """Move excess cash into diversified investments"""
+    return Opportunity(
+        id=f"asset_rebalancing_{uuid.uuid4().hex}",
+        type="investment_allocation",
+        priority="medium",
+        title=f"Rebalance ₹{excess_liquid:,.0f} to Investments",
+        description="Optimize asset allocation by moving excess cash to diversified investments",
+        potential_annual_value=excess_liquid * 0.08,  # 8% additional returns
+        effort_level="medium",
+        time_to_implement="2 weeks",
+        confidence_score=0.78,
+        risk_level="medium",
+        category="portfolio_optimization"
+    )
+
+
+def _build_tax_80c(additional_investment: float, agg: Aggregates) -> Opportunity:
+    """Fill the remaining 80C deduction limit"""
+    annual_income = agg.annual_income
+    tax_bracket = 0.30 if annual_income > 1000000 else 0.20 if annual_income > 500000 else 0.05
+    tax_savings = additional_investment * tax_bracket
+    return Opportunity(
+        id=f"tax_80c_{uuid.uuid4().hex}",
+        type="tax_optimization",
+        priority="medium",
+        title=f"80C Tax Optimization - Save ₹{tax_savings:,.0f}",
+        description=f"Invest ₹{additional_investment:,.0f} more in ELSS/PPF to maximize 80C deduction",
+        potential_annual_value=tax_savings,
+        effort_level="low",
+        time_to_implement="1 week",
+        confidence_score=0.9,
+        risk_level="low",
+        category="tax_optimization"
+    )
+
+
+def _build_income_enhancement(potential_income_increase: float, agg: Aggregates) -> Opportunity:
+    """Upskilling for a salary increment"""
+    return Opportunity(
+        id=f"income_enhancement_{uuid.uuid4().hex}",
+        type="income_enhancement",
+        priority="medium",
+        title=f"Skill Development for ₹{potential_income_increase:,.0f} Income Boost",
+        description="Invest in upskilling for career growth and salary increment",
+        potential_annual_value=potential_income_increase,
+        effort_level="high",
+        time_to_implement="6-12 months",
+        confidence_score=0.65,
+        risk_level="medium",
+        category="career_growth"
+    )
+
+
+# Single-opportunity analyzers as data: metric, threshold and builder, evaluated in order
+OPPORTUNITY_RULES = (
+    # Gain from 7.5% high-yield vs 3.5% typical savings, only for balances above ₹50k
+    OpportunityRule(
+        rule_id="savings_optimization",
+        metric_fn=lambda agg: agg.total_savings * (0.075 - 0.035) if agg.total_savings > 50000 else 0,
+        threshold=5000,  # Only if meaningful impact
+        build=_build_savings_optimization
+    ),
+    # Shortfall against 6 months of expenses, for users with some savings
+    OpportunityRule(
+        rule_id="emergency_fund",
+        metric_fn=lambda agg: agg.monthly_expenses * 6 - agg.total_savings if agg.total_savings > 0 else 0,
+        threshold=0,
+        build=_build_emergency_fund
+    ),
+    # Gap between the recommended SIP (20% of income, max 50k/month) and current monthly investment
+    OpportunityRule(
+        rule_id="sip_optimization",
+        metric_fn=lambda agg: (
+            min(agg.annual_income * 0.2 / 12, 50000) - (agg.total_investments / 12 if agg.total_investments > 0 else 0)
+            if agg.annual_income > 0 else 0
+        ),
+        threshold=5000,
+        build=_build_sip_optimization
+    ),
+    # Cash beyond 30% of investments, when liquid assets exceed half of investments
+    OpportunityRule(
+        rule_id="asset_rebalancing",
+        metric_fn=lambda agg: (
+            agg.total_liquid - agg.total_investments * 0.3
+            if agg.total_liquid > agg.total_investments * 0.5 else 0
+        ),
+        threshold=50000,
+        build=_build_asset_rebalancing
+    ),
+    # Unused 80C limit (₹1.5L) for incomes above ₹5 LPA
+    OpportunityRule(
+        rule_id="tax_80c",
+        metric_fn=lambda agg: 150000 - agg.tax_saver_investments if agg.annual_income > 500000 else 0,
+        threshold=0,
+        build=_build_tax_80c
+    ),
+    # 15% income upside from upskilling for users under 40
+    OpportunityRule(
+        rule_id="income_enhancement",
+        metric_fn=lambda agg: agg.annual_income * 0.15 if agg.age < 40 else 0,
+        threshold=0,
+        build=_build_income_enhancement
+    )
+)
+
 
 class OpportunityEngine:
     """Core business logic for financial opportunity detection"""
@@ -18,63 +403,97 @@ class OpportunityEngine:
         self.vertex_ai = vertex_ai
         self.firestore = firestore
         self.fi_mcp = fi_mcp
+        self.result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)  # (type, data hash) -> result
+        self._result_locks: Dict[Tuple[str, bytes], List[Any]] = {}  # key -> [lock, callers holding or awaiting it]
 
         logger.info("✅ Opportunity engine initialized")
 
     async def generate_opportunities(self, user_data: Dict[str, Any], analysis_type: str = "comprehensive") -> Dict[
         str, Any]:
+        """Generate opportunities, reusing a recent result for identical user data
+
+        Cached results keep the analysis_timestamp of the run that produced them, so it can be up to
+        RESULT_CACHE_TTL seconds old.
+        """
+        cache_key = (analysis_type, self._user_data_digest(user_data))
+
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        # Concurrent requests for the same data wait for one computation instead of stampeding. The lock
+        # is refcounted and dropped only once no caller holds or awaits it, so a newcomer cannot create a
+        # second lock while a woken waiter is still re-acquiring the first.
+        entry = self._result_locks.get(cache_key)
+        if entry is None:
+            entry = self._result_locks[cache_key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                cached = self.result_cache.get(cache_key)
+                if cached is not None:
+                    return copy.deepcopy(cached)
+
+                result = await self._generate_opportunities(user_data, analysis_type)
+                self.result_cache[cache_key] = copy.deepcopy(result)
+                return result
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                self._result_locks.pop(cache_key, None)
+
+    @staticmethod
+    def _user_data_digest(user_data: Dict[str, Any]) -> bytes:
+        """Stable content hash of the request payload, ignoring per-fetch timestamps"""
+        payload = json.dumps(stable_fields(user_data), sort_keys=True, default=str)
+        return blake2b(payload.encode(), digest_size=16).digest()
+
+    async def _generate_opportunities(self, user_data: Dict[str, Any], analysis_type: str) -> Dict[str, Any]:
         """Main opportunity generation logic"""
 
-        logger.info("🔍 Generating financial opportunities", analysis_type=analysis_type)
+        if _stdlib_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generating financial opportunities", analysis_type=analysis_type)
 
         try:
-            opportunities = []
-
-            # 1. Analyze different opportunity categories
-            savings_ops = await self._analyze_savings_optimization(user_data)
-            opportunities.extend(savings_ops)
-
-            investment_ops = await self._analyze_investment_opportunities(user_data)
-            opportunities.extend(investment_ops)
-
-            spending_ops = await self._analyze_spending_optimization(user_data)
-            opportunities.extend(spending_ops)
-
-            debt_ops = await self._analyze_debt_optimization(user_data)
-            opportunities.extend(debt_ops)
-
-            tax_ops = await self._analyze_tax_opportunities(user_data)
-            opportunities.extend(tax_ops)
-
-            income_ops = await self._analyze_income_enhancement(user_data)
-            opportunities.extend(income_ops)
-
-            # 2. Use AI for advanced analysis if enabled
+            # 1. Analyze different opportunity categories off the event loop, fetching market
+            # context and (2.) AI-enhanced opportunities, if enabled, while the local pass runs
+            pending = [
+                asyncio.to_thread(self._run_analyzers, user_data),
+                self._get_market_context()
+            ]
             if analysis_type == "comprehensive":
-                ai_opportunities = await self._get_ai_enhanced_opportunities(user_data, opportunities)
+                pending.append(self._get_ai_enhanced_opportunities(user_data))
+
+            opportunities, market_context, *ai_results = await asyncio.gather(*pending)
+            for ai_opportunities in ai_results:
                 opportunities.extend(ai_opportunities)
 
-            # 3. Score and rank opportunities
-            scored_opportunities = await self._score_and_rank_opportunities(opportunities, user_data)
+            # 3. Score all opportunities and rank only the top 10
+            top_opportunities = await self._score_and_rank_opportunities(opportunities, user_data)
 
             # 4. Generate recommendations
-            recommendations = self._generate_recommendations(scored_opportunities)
+            recommendations = self._generate_recommendations(top_opportunities, opportunities)
 
-            total_annual_value = sum(opp.get("potential_annual_value", 0) for opp in scored_opportunities)
+            # Running totals in one pass over the shared list
+            total_annual_value = 0
+            total_confidence = 0
+            for opp in opportunities:
+                total_annual_value += opp.potential_annual_value
+                total_confidence += opp.confidence_score
 
             result = {
-                "opportunities": scored_opportunities[:10],  # Top 10
+                "opportunities": [_opportunity_to_dict(opp) for opp in top_opportunities],
                 "total_annual_value": total_annual_value,
-                "confidence_score": np.mean([opp.get("confidence_score", 0.5) for opp in
-                                             scored_opportunities]) if scored_opportunities else 0.5,
+                "confidence_score": total_confidence / len(opportunities) if opportunities else 0.5,
                 "recommendations": recommendations,
                 "analysis_timestamp": datetime.now().isoformat(),
-                "market_context": await self._get_market_context()
+                "market_context": market_context
             }
 
-            logger.info("✅ Opportunities generated",
-                        count=len(scored_opportunities),
-                        total_value=total_annual_value)
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Opportunities generated",
+                             count=len(opportunities),
+                             total_value=total_annual_value)
 
             return result
 
@@ -82,192 +501,139 @@ class OpportunityEngine:
             logger.error("❌ Failed to generate opportunities", error=str(e))
             raise
 
-    async def _analyze_savings_optimization(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze savings account optimization opportunities"""
-        opportunities = []
-
+    def _transactions_to_soa(self, transactions: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Columnar view of transactions: datetime64 dates (NaT if unparseable), amounts and categories"""
+        date_strings = [t.get("date", "2024-01-01") for t in transactions]
         try:
-            accounts = user_data.get("accounts", [])
-
-            total_savings = sum(
-                acc.get("balance", 0) for acc in accounts
-                if acc.get("type") in ["savings", "checking"]
-            )
-
-            if total_savings > 50000:
-                # High-yield savings opportunity
-                current_rate = 0.035  # 3.5% typical savings
-                high_yield_rate = 0.075  # 7.5% high-yield
-                annual_gain = total_savings * (high_yield_rate - current_rate)
-
-                if annual_gain > 5000:  # Only if meaningful impact
-                    opportunities.append({
-                        "id": f"savings_opt_{datetime.now().timestamp()}",
-                        "type": "savings_optimization",
-                        "priority": "high" if annual_gain > 15000 else "medium",
-                        "title": f"High-Yield Savings Optimization",
-                        "description": f"Move ₹{total_savings:,.0f} to high-yield savings account earning 7.5% instead of 3.5%",
-                        "potential_annual_value": annual_gain,
-                        "effort_level": "low",
-                        "time_to_implement": "1-2 days",
-                        "confidence_score": 0.95,
-                        "risk_level": "very_low",
-                        "category": "immediate_gain",
-                        "action_steps": [
-                            "Research FDIC-insured high-yield savings accounts",
-                            "Compare rates from digital banks (Marcus, Ally, etc.)",
-                            "Open new account online",
-                            "Transfer funds and update auto-payments"
-                        ],
-                        "financial_impact": {
-                            "monthly_gain": annual_gain / 12,
-                            "5_year_value": annual_gain * 5.5,  # With compounding
-                            "implementation_cost": 0
-                        },
-                        "prerequisites": [],
-                        "timeline_milestones": [
-                            {"milestone": "Research and compare", "timeline": "Day 1"},
-                            {"milestone": "Open account", "timeline": "Day 2"},
-                            {"milestone": "Transfer funds", "timeline": "Day 3"}
-                        ]
-                    })
-
-            # Emergency fund analysis
-            monthly_expenses = self._calculate_monthly_expenses(user_data)
-            emergency_target = monthly_expenses * 6
-            current_emergency = total_savings
-
-            if current_emergency < emergency_target and current_emergency > 0:
-                shortage = emergency_target - current_emergency
-                opportunities.append({
-                    "id": f"emergency_fund_{datetime.now().timestamp()}",
-                    "type": "risk_mitigation",
-                    "priority": "medium" if shortage < 100000 else "high",
-                    "title": f"Emergency Fund Gap: ₹{shortage:,.0f}",
-                    "description": f"Build emergency fund to 6 months of expenses (₹{emergency_target:,.0f})",
-                    "potential_annual_value": shortage * 0.1,  # Peace of mind value
-                    "effort_level": "medium",
-                    "time_to_implement": "6-12 months",
-                    "confidence_score": 0.9,
-                    "risk_level": "low",
-                    "category": "financial_security"
-                })
-
-            return opportunities
+            with warnings.catch_warnings():
+                # Offsets and "Z" are normalized to UTC; numpy warns that it drops the timezone
+                warnings.simplefilter("ignore", UserWarning)
+                warnings.simplefilter("ignore", DeprecationWarning)
+                dates = np.array(date_strings, dtype="datetime64[s]")
+        except (TypeError, ValueError):
+            # Bulk parsing rejects the whole column on one bad value; parse row by row instead
+            dates = np.array([_parse_date_or_nat(value) for value in date_strings], dtype="datetime64[s]")
+
+        # Malformed amounts become NaN and are masked out with unparseable dates
+        amounts = np.fromiter((_as_number(t.get("amount", 0), np.nan) for t in transactions),
+                              dtype=np.float64, count=len(transactions))
+        categories = np.array([t.get("category") or "other" for t in transactions], dtype=object)
+        return dates, amounts, categories
+
+    def _run_analyzers(self, user_data: Dict[str, Any]) -> List[Opportunity]:
+        """Run the rule-based analyzers over aggregates computed once (CPU-bound)"""
+        agg = self._precompute(user_data)
+
+        opportunities = self._apply_rules(agg)
+        opportunities.extend(self._analyze_spending_optimization(agg))
+        opportunities.extend(self._analyze_debt_optimization(agg))
+        return opportunities
+
+    def _apply_rules(self, agg: Aggregates) -> List[Opportunity]:
+        """Evaluate the table-driven opportunity rules against the precomputed aggregates"""
+        opportunities = []
 
-        except Exception as e:
-            logger.error("❌ Savings optimization analysis failed", error=str(e))
-            return []
+        for rule in OPPORTUNITY_RULES:
+            try:
+                metric = rule.metric_fn(agg)
+                if metric > rule.threshold:
+                    opportunities.append(rule.build(metric, agg))
+            except Exception as e:
+                logger.error("❌ Opportunity rule failed", rule=rule.rule_id, error=str(e))
 
-    async def _analyze_investment_opportunities(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze investment optimization opportunities"""
-        opportunities = []
+        return opportunities
 
-        try:
-            investments = user_data.get("investments", [])
-            accounts = user_data.get("accounts", [])
-            user_profile = user_data.get("user_profile", {})
-
-            total_investments = sum(inv.get("current_value", 0) for inv in investments)
-            total_liquid = sum(acc.get("balance", 0) for acc in accounts)
-            annual_income = user_profile.get("annual_income", 0)
-
-            # SIP optimization
-            if annual_income > 0:
-                recommended_sip = min(annual_income * 0.2 / 12, 50000)  # 20% of income or max 50k/month
-                current_monthly_investment = total_investments / 12 if total_investments > 0 else 0
-
-                if recommended_sip > current_monthly_investment + 5000:
-                    additional_sip = recommended_sip - current_monthly_investment
-                    projected_returns = self._calculate_sip_returns(additional_sip, 10, 0.12)
-
-                    opportunities.append({
-                        "id": f"sip_optimization_{datetime.now().timestamp()}",
-                        "type": "investment_growth",
-                        "priority": "high",
-                        "title": f"Increase SIP by ₹{additional_sip:,.0f}/month",
-                        "description": f"Optimal SIP based on your income. Projected 10-year value: ₹{projected_returns:,.0f}",
-                        "potential_annual_value": additional_sip * 12 * 0.12,
-                        "effort_level": "low",
-                        "time_to_implement": "1 week",
-                        "confidence_score": 0.85,
-                        "risk_level": "medium",
-                        "category": "wealth_building",
-                        "financial_impact": {
-                            "10_year_corpus": projected_returns,
-                            "monthly_investment": additional_sip,
-                            "expected_annual_return": 0.12
-                        }
-                    })
-
-            # Asset allocation optimization
-            if total_liquid > total_investments * 0.5:  # Too much in liquid assets
-                excess_liquid = total_liquid - (total_investments * 0.3)
-                if excess_liquid > 50000:
-                    potential_returns = excess_liquid * 0.08  # 8% additional returns
-
-                    opportunities.append({
-                        "id": f"asset_rebalancing_{datetime.now().timestamp()}",
-                        "type": "investment_allocation",
-                        "priority": "medium",
-                        "title": f"Rebalance ₹{excess_liquid:,.0f} to Investments",
-                        "description": "Optimize asset allocation by moving excess cash to diversified investments",
-                        "potential_annual_value": potential_returns,
-                        "effort_level": "medium",
-                        "time_to_implement": "2 weeks",
-                        "confidence_score": 0.78,
-                        "risk_level": "medium",
-                        "category": "portfolio_optimization"
-                    })
+    def _precompute(self, user_data: Dict[str, Any]) -> Aggregates:
+        """Derive everything the analyzers need with a single traversal of user_data"""
+        user_profile = user_data.get("user_profile", {})
 
-            return opportunities
+        accounts = user_data.get("accounts", [])
+        investments = user_data.get("investments", [])
+        transactions = user_data.get("transactions", [])
 
-        except Exception as e:
-            logger.error("❌ Investment analysis failed", error=str(e))
+        total_savings = 0
+        total_liquid = 0
+        for acc in accounts:
+            balance = _as_number(acc.get("balance", 0))
+            total_liquid += balance
+            if acc.get("type") in ["savings", "checking"]:
+                total_savings += balance
+
+        total_investments = 0
+        tax_saver_investments = 0
+        for inv in investments:
+            current_value = _as_number(inv.get("current_value", 0))
+            total_investments += current_value
+            if inv.get("category") in ["ppf", "elss", "tax_saver"]:
+                tax_saver_investments += current_value
+
+        if transactions:
+            # Transactions are converted to columns once; both the 30-day category spend and the
+            # monthly average are masked reductions over the same arrays
+            dates, amounts, categories = self._transactions_to_soa(transactions)
+
+            valid = ~np.isnat(dates) & np.isfinite(amounts)
+            dates, amounts, categories = dates[valid], amounts[valid], categories[valid]
+
+            expenses = np.where(amounts < 0, -amounts, 0.0)
+            month_keys = dates.astype("datetime64[M]").astype(np.int64)
+            recent = (amounts < 0) & (dates > np.datetime64(datetime.now() - timedelta(days=31), "s"))
+            spending_by_category = self._sum_by_category(categories, expenses, recent)
+            monthly_expenses = self._average_monthly_expenses(month_keys, expenses)
+        else:
+            spending_by_category = {}
+            # Estimate based on income
+            # Income is optional at registration; None or malformed falls back to the default estimate
+            monthly_expenses = (_as_number(user_profile.get("annual_income")) or 600000) * 0.6 / 12  # Assume 60% of income as expenses
+
+        return Aggregates(
+            spending_by_category=spending_by_category,
+            monthly_expenses=monthly_expenses,
+            total_savings=total_savings,
+            total_liquid=total_liquid,
+            total_investments=total_investments,
+            tax_saver_investments=tax_saver_investments,
+            annual_income=_as_number(user_profile.get("annual_income")),
+            age=int(_as_number(user_profile.get("age")) or 30),
+            debt_accounts=user_data.get("debt", []),
+            has_accounts=bool(accounts),
+            has_investments=bool(investments),
+            has_transactions=bool(transactions)
+        )
+
+    def _analyze_spending_optimization(self, agg: Aggregates) -> List[Opportunity]:
+        """Analyze spending optimization opportunities"""
+        if not agg.has_transactions:
             return []
 
-    async def _analyze_spending_optimization(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze spending optimization opportunities"""
         opportunities = []
 
         try:
-            transactions = user_data.get("transactions", [])
-
-            # Categorize spending
-            spending_by_category = {}
-            recent_transactions = [
-                t for t in transactions
-                if (datetime.now() - datetime.fromisoformat(t.get("date", "2024-01-01"))).days <= 30
-            ]
-
-            for transaction in recent_transactions:
-                if transaction.get("amount", 0) < 0:  # Expenses
-                    category = transaction.get("category", "other")
-                    amount = abs(transaction.get("amount", 0))
-                    spending_by_category[category] = spending_by_category.get(category, 0) + amount
-
             # Analyze high-impact categories
-            for category, monthly_amount in spending_by_category.items():
+            for category, monthly_amount in agg.spending_by_category.items():
                 if monthly_amount > 10000:  # Categories with significant spending
-                    optimization_potential = self._get_category_optimization_potential(category, monthly_amount)
-
-                    if optimization_potential["savings"] > 2000:  # Meaningful savings
-                        annual_savings = optimization_potential["savings"] * 12
-
-                        opportunities.append({
-                            "id": f"spending_{category}_{datetime.now().timestamp()}",
-                            "type": "expense_reduction",
-                            "priority": "medium",
-                            "title": f"Optimize {category.title()} Spending",
-                            "description": f"Reduce {category} expenses by {optimization_potential['percentage']}% through {optimization_potential['method']}",
-                            "potential_annual_value": annual_savings,
-                            "effort_level": optimization_potential["effort"],
-                            "time_to_implement": optimization_potential["timeline"],
-                            "confidence_score": optimization_potential["confidence"],
-                            "risk_level": "low",
-                            "category": "lifestyle_optimization",
-                            "action_steps": optimization_potential["action_steps"]
-                        })
+                    strategy = CATEGORY_INFO.get(category)
+                    if strategy is None:
+                        strategy = {**DEFAULT_OPTIMIZATION_STRATEGY, "title": category.title()}
+                    monthly_savings = monthly_amount * (strategy["percentage"] / 100)
+
+                    if monthly_savings > 2000:  # Meaningful savings
+                        annual_savings = monthly_savings * 12
+
+                        opportunities.append(Opportunity(
+                            id=f"spending_{category}_{uuid.uuid4().hex}",
+                            type="expense_reduction",
+                            priority="medium",
+                            title=f"Optimize {strategy['title']} Spending",
+                            description=f"Reduce {category} expenses by {strategy['percentage']}% through {strategy['method']}",
+                            potential_annual_value=annual_savings,
+                            effort_level=strategy["effort"],
+                            time_to_implement=strategy["timeline"],
+                            confidence_score=strategy["confidence"],
+                            risk_level="low",
+                            category="lifestyle_optimization",
+                            action_steps=strategy["action_steps"]
+                        ))
 
             return opportunities
 
@@ -275,14 +641,15 @@ class OpportunityEngine:
             logger.error("❌ Spending analysis failed", error=str(e))
             return []
 
-    async def _analyze_debt_optimization(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _analyze_debt_optimization(self, agg: Aggregates) -> List[Opportunity]:
         """Analyze debt optimization opportunities"""
+        if not agg.debt_accounts:
+            return []
+
         opportunities = []
 
         try:
-            debt_accounts = user_data.get("debt", [])
-
-            for debt in debt_accounts:
+            for debt in agg.debt_accounts:
                 balance = debt.get("balance", 0)
                 interest_rate = debt.get("interest_rate", 24.0)
                 debt_type = debt.get("type", "unknown")
@@ -291,25 +658,25 @@ class OpportunityEngine:
                     annual_interest = balance * (interest_rate / 100)
 
                     if debt_type == "credit_card" and interest_rate > 20:
-                        opportunities.append({
-                            "id": f"debt_optimization_{debt.get('id', 'unknown')}",
-                            "type": "debt_reduction",
-                            "priority": "high",
-                            "title": f"Pay Down High-Interest {debt_type.title()}",
-                            "description": f"Reduce ₹{balance:,.0f} debt at {interest_rate}% interest",
-                            "potential_annual_value": annual_interest,
-                            "effort_level": "high",
-                            "time_to_implement": "3-12 months",
-                            "confidence_score": 0.95,
-                            "risk_level": "low",
-                            "category": "debt_management",
-                            "action_steps": [
+                        opportunities.append(Opportunity(
+                            id=f"debt_optimization_{debt.get('id', 'unknown')}",
+                            type="debt_reduction",
+                            priority="high",
+                            title=f"Pay Down High-Interest {debt_type.title()}",
+                            description=f"Reduce ₹{balance:,.0f} debt at {interest_rate}% interest",
+                            potential_annual_value=annual_interest,
+                            effort_level="high",
+                            time_to_implement="3-12 months",
+                            confidence_score=0.95,
+                            risk_level="low",
+                            category="debt_management",
+                            action_steps=[
                                 "List all debts by interest rate",
                                 "Pay minimum on all, extra on highest rate",
                                 "Consider debt consolidation options",
                                 "Set up automatic payments"
                             ]
-                        })
+                        ))
 
             return opportunities
 
@@ -317,86 +684,7 @@ class OpportunityEngine:
             logger.error("❌ Debt analysis failed", error=str(e))
             return []
 
-    async def _analyze_tax_opportunities(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze tax optimization opportunities"""
-        opportunities = []
-
-        try:
-            user_profile = user_data.get("user_profile", {})
-            investments = user_data.get("investments", [])
-
-            annual_income = user_profile.get("annual_income", 0)
-
-            if annual_income > 500000:  # Above ₹5 LPA
-                # 80C optimization
-                current_80c = sum(
-                    inv.get("current_value", 0) for inv in investments
-                    if inv.get("category") in ["ppf", "elss", "tax_saver"]
-                )
-
-                max_80c = 150000
-                if current_80c < max_80c:
-                    additional_investment = max_80c - current_80c
-                    tax_bracket = 0.30 if annual_income > 1000000 else 0.20 if annual_income > 500000 else 0.05
-                    tax_savings = additional_investment * tax_bracket
-
-                    opportunities.append({
-                        "id": f"tax_80c_{datetime.now().timestamp()}",
-                        "type": "tax_optimization",
-                        "priority": "medium",
-                        "title": f"80C Tax Optimization - Save ₹{tax_savings:,.0f}",
-                        "description": f"Invest ₹{additional_investment:,.0f} more in ELSS/PPF to maximize 80C deduction",
-                        "potential_annual_value": tax_savings,
-                        "effort_level": "low",
-                        "time_to_implement": "1 week",
-                        "confidence_score": 0.9,
-                        "risk_level": "low",
-                        "category": "tax_optimization"
-                    })
-
-            return opportunities
-
-        except Exception as e:
-            logger.error("❌ Tax analysis failed", error=str(e))
-            return []
-
-    async def _analyze_income_enhancement(self, user_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Analyze income enhancement opportunities"""
-        opportunities = []
-
-        try:
-            user_profile = user_data.get("user_profile", {})
-
-            # Skill-based income opportunities
-            age = user_profile.get("age", 30)
-            current_income = user_profile.get("annual_income", 0)
-
-            if age < 40 and current_income > 0:
-                # Upskilling opportunities
-                potential_income_increase = current_income * 0.15  # 15% potential increase
-
-                opportunities.append({
-                    "id": f"income_enhancement_{datetime.now().timestamp()}",
-                    "type": "income_enhancement",
-                    "priority": "medium",
-                    "title": f"Skill Development for ₹{potential_income_increase:,.0f} Income Boost",
-                    "description": "Invest in upskilling for career growth and salary increment",
-                    "potential_annual_value": potential_income_increase,
-                    "effort_level": "high",
-                    "time_to_implement": "6-12 months",
-                    "confidence_score": 0.65,
-                    "risk_level": "medium",
-                    "category": "career_growth"
-                })
-
-            return opportunities
-
-        except Exception as e:
-            logger.error("❌ Income analysis failed", error=str(e))
-            return []
-
-    async def _get_ai_enhanced_opportunities(self, user_data: Dict[str, Any],
-                                             existing_opportunities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    async def _get_ai_enhanced_opportunities(self, user_data: Dict[str, Any]) -> List[Opportunity]:
         """Get AI-enhanced opportunities using Vertex AI"""
         try:
             # Use Vertex AI to find additional opportunities
@@ -404,20 +692,20 @@ class OpportunityEngine:
 
             ai_opportunities = []
             for opp in ai_analysis.get("market_opportunities", []):
-                ai_opportunities.append({
-                    "id": f"ai_enhanced_{datetime.now().timestamp()}",
-                    "type": opp.get("type", "investment"),
-                    "priority": "medium",
-                    "title": opp.get("title", "AI-Detected Opportunity"),
-                    "description": opp.get("description", ""),
-                    "potential_annual_value": opp.get("potential_annual_value", 0),
-                    "effort_level": "medium",
-                    "time_to_implement": opp.get("time_horizon", "3-6 months"),
-                    "confidence_score": opp.get("confidence", 0.7),
-                    "risk_level": opp.get("risk_level", "medium"),
-                    "category": "ai_recommended",
-                    "action_steps": opp.get("action_steps", [])
-                })
+                ai_opportunities.append(Opportunity(
+                    id=f"ai_enhanced_{uuid.uuid4().hex}",
+                    type=opp.get("type", "investment"),
+                    priority="medium",
+                    title=opp.get("title", "AI-Detected Opportunity"),
+                    description=opp.get("description", ""),
+                    potential_annual_value=opp.get("potential_annual_value", 0),
+                    effort_level="medium",
+                    time_to_implement=opp.get("time_horizon", "3-6 months"),
+                    confidence_score=opp.get("confidence", 0.7),
+                    risk_level=opp.get("risk_level", "medium"),
+                    category="ai_recommended",
+                    action_steps=opp.get("action_steps", [])
+                ))
 
             return ai_opportunities
 
@@ -425,41 +713,34 @@ class OpportunityEngine:
             logger.error("❌ AI enhancement failed", error=str(e))
             return []
 
-    async def _score_and_rank_opportunities(self, opportunities: List[Dict[str, Any]], user_data: Dict[str, Any]) -> \
-    List[Dict[str, Any]]:
-        """Score and rank opportunities by impact and feasibility"""
+    async def _score_and_rank_opportunities(self, opportunities: List[Opportunity], user_data: Dict[str, Any],
+                                            top_n: int = 10) -> List[Opportunity]:
+        """Score opportunities in place by impact and feasibility, returning the top_n best"""
 
-        scored_opportunities = []
-
-        for opp in opportunities:
-            # Calculate composite score
-            impact_score = min(opp.get("potential_annual_value", 0) / 10000, 10)  # Normalize to 10
-            confidence_score = opp.get("confidence_score", 0.5) * 10
+        self._assign_composite_scores(opportunities)
 
-            effort_multiplier = {
-                "low": 1.0,
-                "medium": 0.8,
-                "high": 0.6
-            }.get(opp.get("effort_level", "medium"), 0.8)
+        # Partial selection by composite score: O(n log k) instead of sorting everything
+        return heapq.nlargest(top_n, opportunities, key=attrgetter("composite_score"))
 
-            priority_multiplier = {
-                "urgent": 1.2,
-                "high": 1.0,
-                "medium": 0.8,
-                "low": 0.6
-            }.get(opp.get("priority", "medium"), 0.8)
+    @staticmethod
+    def _assign_composite_scores(opportunities: List[Opportunity]):
+        """Columnize opportunities, run the scoring kernel and write scores back in place"""
+        count = len(opportunities)
+        values = np.fromiter((opp.potential_annual_value for opp in opportunities), dtype=np.float64, count=count)
+        confidences = np.fromiter((opp.confidence_score for opp in opportunities), dtype=np.float64, count=count)
+        effort_codes = np.fromiter((EFFORT_CODES.get(opp.effort_level, EFFORT_CODES["medium"]) for opp in opportunities),
+                                   dtype=np.intp, count=count)
+        priority_codes = np.fromiter((PRIORITY_CODES.get(opp.priority, PRIORITY_CODES["medium"]) for opp in opportunities),
+                                     dtype=np.intp, count=count)
 
-            composite_score = (impact_score + confidence_score) * effort_multiplier * priority_multiplier
+        # Impact normalized to 10 plus confidence, weighted by effort and priority
+        scores = composite_scores(values, confidences, effort_codes, priority_codes)
 
-            opp["composite_score"] = composite_score
-            scored_opportunities.append(opp)
+        for opp, composite_score in zip(opportunities, scores.tolist()):
+            opp.composite_score = composite_score
 
-        # Sort by composite score
-        scored_opportunities.sort(key=lambda x: x["composite_score"], reverse=True)
-
-        return scored_opportunities
-
-    def _generate_recommendations(self, opportunities: List[Dict[str, Any]]) -> List[str]:
+    def _generate_recommendations(self, top_opportunities: List[Opportunity],
+                                  opportunities: List[Opportunity]) -> List[str]:
         """Generate actionable recommendations"""
         recommendations = []
 
@@ -467,146 +748,61 @@ class OpportunityEngine:
             return ["Your finances are well-optimized! Keep monitoring for new opportunities."]
 
         # Top priority recommendations
-        high_impact_ops = [opp for opp in opportunities[:3] if opp.get("potential_annual_value", 0) > 10000]
+        high_impact_op = next((opp for opp in top_opportunities[:3] if opp.potential_annual_value > 10000), None)
 
-        if high_impact_ops:
+        if high_impact_op:
             recommendations.append(
-                f"Priority: {high_impact_ops[0]['title']} could save ₹{high_impact_ops[0]['potential_annual_value']:,.0f} annually")
+                f"Priority: {high_impact_op.title} could save ₹{high_impact_op.potential_annual_value:,.0f} annually")
+
+        # Best-scoring quick win and risk mitigation, found in a single pass
+        quick_win = None
+        risk_op = None
+        for opp in opportunities:
+            if opp.effort_level == "low" and (quick_win is None or opp.composite_score > quick_win.composite_score):
+                quick_win = opp
+            if opp.type == "risk_mitigation" and (risk_op is None or opp.composite_score > risk_op.composite_score):
+                risk_op = opp
 
-        # Quick wins
-        quick_wins = [opp for opp in opportunities if opp.get("effort_level") == "low"]
-        if quick_wins:
-            recommendations.append(f"Quick win: {quick_wins[0]['title']} - minimal effort, good returns")
+        if quick_win:
+            recommendations.append(f"Quick win: {quick_win.title} - minimal effort, good returns")
 
         # Risk mitigation
-        risk_ops = [opp for opp in opportunities if opp.get("type") == "risk_mitigation"]
-        if risk_ops:
-            recommendations.append(f"Security: {risk_ops[0]['title']} - strengthen your financial foundation")
+        if risk_op:
+            recommendations.append(f"Security: {risk_op.title} - strengthen your financial foundation")
 
         return recommendations[:5]  # Top 5 recommendations
 
     async def _get_market_context(self) -> Dict[str, Any]:
         """Get current market context"""
-        return {
-            "interest_rates": {"repo_rate": 6.5, "fd_rates": "6.5-7.5%"},
-            "inflation": 4.2,
-            "market_trend": "volatile",
-            "recommendation": "Focus on diversification and emergency fund"
-        }
+        # Callers own the returned result, so they get a copy of the shared table
+        return copy.deepcopy(MARKET_CONTEXT)
 
     # Helper methods
-    def _calculate_monthly_expenses(self, user_data: Dict[str, Any]) -> float:
-        """Calculate average monthly expenses"""
-        transactions = user_data.get("transactions", [])
+    def _sum_by_category(self, categories: np.ndarray, expenses: np.ndarray, mask: np.ndarray) -> Dict[str, float]:
+        """Total expenses per category over the masked rows, in order of first appearance"""
+        if not mask.any():
+            return {}
 
-        if not transactions:
-            # Estimate based on income
-            income = user_data.get("user_profile", {}).get("annual_income", 600000)
-            return income * 0.6 / 12  # Assume 60% of income as expenses
+        selected = categories[mask]
+        names, first_seen, category_idx = np.unique(selected, return_index=True, return_inverse=True)
+        totals = np.bincount(category_idx, weights=expenses[mask], minlength=len(names))
 
-        # Calculate from actual transactions
-        monthly_expenses = []
-        current_month_expenses = 0
-        current_month = None
+        order = np.argsort(first_seen)
+        return dict(zip(names[order].tolist(), totals[order].tolist()))
 
-        for transaction in sorted(transactions, key=lambda x: x.get("date", "")):
-            try:
-                transaction_date = datetime.fromisoformat(transaction.get("date", "2024-01-01"))
-                month_key = (transaction_date.year, transaction_date.month)
-
-                if current_month != month_key:
-                    if current_month is not None:
-                        monthly_expenses.append(current_month_expenses)
-                    current_month = month_key
-                    current_month_expenses = 0
-
-                if transaction.get("amount", 0) < 0:  # Expense
-                    current_month_expenses += abs(transaction.get("amount", 0))
-            except:
-                continue
-
-        if current_month_expenses > 0:
-            monthly_expenses.append(current_month_expenses)
-
-        return np.mean(monthly_expenses) if monthly_expenses else 50000
-
-    def _calculate_sip_returns(self, monthly_sip: float, years: int, annual_return: float) -> float:
-        """Calculate SIP returns with compounding"""
-        monthly_return = annual_return / 12
-        months = years * 12
-
-        future_value = monthly_sip * (((1 + monthly_return) ** months - 1) / monthly_return) * (1 + monthly_return)
-        return future_value
-
-    def _get_category_optimization_potential(self, category: str, monthly_amount: float) -> Dict[str, Any]:
-        """Get optimization potential for spending category"""
-
-        optimization_strategies = {
-            "food": {
-                "percentage": 25,
-                "method": "meal planning and cooking at home",
-                "effort": "medium",
-                "timeline": "1 month",
-                "confidence": 0.75,
-                "action_steps": [
-                    "Plan weekly meals and create shopping lists",
-                    "Cook at home 4-5 days per week",
-                    "Use food delivery apps mindfully",
-                    "Buy groceries in bulk for non-perishables"
-                ]
-            },
-            "transport": {
-                "percentage": 20,
-                "method": "public transport and ride optimization",
-                "effort": "low",
-                "timeline": "2 weeks",
-                "confidence": 0.8,
-                "action_steps": [
-                    "Use public transport for daily commute",
-                    "Combine errands into single trips",
-                    "Consider carpooling options",
-                    "Walk or cycle for short distances"
-                ]
-            },
-            "entertainment": {
-                "percentage": 30,
-                "method": "budget allocation and free alternatives",
-                "effort": "low",
-                "timeline": "1 month",
-                "confidence": 0.85,
-                "action_steps": [
-                    "Set monthly entertainment budget",
-                    "Explore free events and activities",
-                    "Use discount apps and offers",
-                    "Limit expensive outings to special occasions"
-                ]
-            },
-            "shopping": {
-                "percentage": 35,
-                "method": "planned purchases and comparison shopping",
-                "effort": "medium",
-                "timeline": "2 months",
-                "confidence": 0.7,
-                "action_steps": [
-                    "Create shopping lists and stick to them",
-                    "Compare prices across platforms",
-                    "Wait 24 hours before impulse purchases",
-                    "Use cashback and reward programs"
-                ]
-            }
-        }
+    def _average_monthly_expenses(self, month_keys: np.ndarray, expenses: np.ndarray) -> float:
+        """Calculate average monthly expenses from per-transaction month keys and expense amounts"""
+        if not month_keys.size:
+            return 50000
+
+        months, month_idx = np.unique(month_keys, return_inverse=True)
+        monthly_expenses = np.bincount(month_idx, weights=expenses, minlength=len(months))
+
+        # A trailing month with no expenses yet is still in progress; leave it out of the average
+        if monthly_expenses[-1] <= 0:
+            monthly_expenses = monthly_expenses[:-1]
 
-        strategy = optimization_strategies.get(category, {
-            "percentage": 15,
-            "method": "mindful spending and budgeting",
-            "effort": "medium",
-            "timeline": "1-2 months",
-            "confidence": 0.6,
-            "action_steps": ["Track expenses", "Set category budget", "Review monthly"]
-        })
-
-        strategy["savings"] = monthly_amount * (strategy["percentage"] / 100)
-        return strategy
+        return float(monthly_expenses.mean()) if monthly_expenses.size else 50000
 
     async def cleanup(self):
         """Cleanup resources"""
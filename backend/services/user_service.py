@@ -1,12 +1,33 @@
 # backend/services/user_service.py
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import structlog
 from backend.services.firestore_service import FirestoreService
 from backend.services.auth_service import AuthService
 
 logger = structlog.get_logger()
 
+# bcrypt releases the GIL, so a few threads keep password hashing off the event loop
+CRYPTO_WORKERS = 4
+
+# Profile and context views only need these fields; the password hash is never read for them
+USER_PROFILE_FIELDS = (
+    "user_id", "name", "age", "city", "annual_income", "risk_tolerance", "preferences", "goals"
+)
+
+# Fields a user may edit through update_user_profile
+ALLOWED_PROFILE_FIELDS = frozenset({
+    "name", "age", "phone", "city", "annual_income", "risk_tolerance", "preferences", "goals"
+})
+
+
+def _scrub_user(user: Dict[str, Any]) -> Dict[str, Any]:
+    """New dict without the password hash; cached user dicts are shared and must not be mutated"""
+    return {key: value for key, value in user.items() if key != "password_hash"}
+
 
 class UserService:
     """Service for user management operations"""
@@ -14,14 +35,25 @@ class UserService:
     def __init__(self, firestore_service: FirestoreService, auth_service: AuthService):
         self.firestore = firestore_service
         self.auth = auth_service
+        self._crypto_pool = ThreadPoolExecutor(max_workers=CRYPTO_WORKERS, thread_name_prefix="crypto")
+
+        # Unknown emails are verified against this hash so both login failures cost one bcrypt round
+        self._dummy_password_hash = self.auth.hash_password(secrets.token_urlsafe(16))
+
+        # Concurrent lookups of the same user share one Firestore read
+        self._inflight_users: Dict[Tuple[str, Optional[Tuple[str, ...]]], asyncio.Task] = {}
 
         logger.info("✅ User service initialized")
 
+    async def _run_crypto(self, func, *args):
+        """Run a CPU-bound password hash/verify on the crypto pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._crypto_pool, func, *args)
+
     async def create_user(self, user_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new user with hashed password"""
         try:
             # Hash password
-            password_hash = self.auth.hash_password(user_data["password"])
+            password_hash = await self._run_crypto(self.auth.hash_password, user_data["password"])
 
             # Prepare user data for storage
             user_create_data = {
@@ -34,10 +66,7 @@ class UserService:
             user_doc = await self.firestore.create_user(user_create_data)
 
             # Remove password hash from response
-            user_response = user_doc.copy()
-            del user_response["password_hash"]
-
-            return user_response
+            return _scrub_user(user_doc)
 
         except Exception as e:
             logger.error("❌ Failed to create user", error=str(e))
@@ -49,11 +78,11 @@ class UserService:
             # Get user by email
             user = await self.firestore.get_user_by_email(email)
 
-            if not user:
-                return None
+            # Verify password, even for unknown emails, so response time does not reveal registration
+            password_hash = user["password_hash"] if user else self._dummy_password_hash
+            password_ok = await self._run_crypto(self.auth.verify_password, password, password_hash)
 
-            # Verify password
-            if not self.auth.verify_password(password, user["password_hash"]):
+            if not user or not password_ok:
                 return None
 
             # Update last login
@@ -62,26 +91,33 @@ class UserService:
             })
 
             # Remove password hash from response
-            user_response = user.copy()
-            del user_response["password_hash"]
-
-            return user_response
+            return _scrub_user(user)
 
         except Exception as e:
             logger.error("❌ Authentication failed", email=email, error=str(e))
             return None
 
-    async def get_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+    async def get_user(self, user_id: str, fields: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
+        """Get user by ID, sharing one lookup between concurrent callers"""
+        key = (user_id, fields)
+        task = self._inflight_users.get(key)
+        if task is not None:
+            user = await asyncio.shield(task)
+            return user.copy() if user else None
+
+        task = asyncio.ensure_future(self._load_user(user_id, fields))
+        self._inflight_users[key] = task
+        task.add_done_callback(lambda _: self._inflight_users.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load_user(self, user_id: str, fields: Optional[Tuple[str, ...]] = None) -> Optional[Dict[str, Any]]:
         """Get user by ID"""
         try:
-            user = await self.firestore.get_user_by_id(user_id)
+            user = await self.firestore.get_user_by_id(user_id, fields=fields)
 
             if user:
                 # Remove password hash
-                user_response = user.copy()
-                if "password_hash" in user_response:
-                    del user_response["password_hash"]
-                return user_response
+                return _scrub_user(user)
 
             return None
 
@@ -89,6 +125,16 @@ class UserService:
             logger.error("❌ Failed to get user", user_id=user_id, error=str(e))
             return None
 
+    async def get_users_by_ids(self, user_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Get several users with one batched Firestore read"""
+        try:
+            users = await self.firestore.get_users_by_ids(user_ids)
+            return {user_id: _scrub_user(user) if user else None for user_id, user in users.items()}
+
+        except Exception as e:
+            logger.error("❌ Failed to get users", count=len(user_ids), error=str(e))
+            return {user_id: None for user_id in user_ids}
+
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
         """Get user by email"""
         try:
@@ -96,10 +142,7 @@ class UserService:
 
             if user:
                 # Remove password hash
-                user_response = user.copy()
-                if "password_hash" in user_response:
-                    del user_response["password_hash"]
-                return user_response
+                return _scrub_user(user)
 
             return None
 
@@ -110,7 +153,7 @@ class UserService:
     async def get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Get user profile with preferences and goals"""
         try:
-            user = await self.get_user(user_id)
+            user = await self.get_user(user_id, fields=USER_PROFILE_FIELDS)
 
             if not user:
                 return {}
@@ -133,7 +176,7 @@ class UserService:
     async def get_user_context(self, user_id: str) -> Dict[str, Any]:
         """Get user context for decision analysis"""
         try:
-            user = await self.get_user(user_id)
+            user = await self.get_user(user_id, fields=USER_PROFILE_FIELDS)
 
             if not user:
                 return {}
@@ -155,16 +198,15 @@ class UserService:
         """Update user profile"""
         try:
             # Filter allowed fields
-            allowed_fields = [
-                "name", "age", "phone", "city", "annual_income",
-                "risk_tolerance", "preferences", "goals"
-            ]
-
             update_data = {
                 key: value for key, value in profile_data.items()
-                if key in allowed_fields
+                if key in ALLOWED_PROFILE_FIELDS
             }
 
+            # Nothing editable changed: skip the Firestore write and cache invalidation
+            if not update_data:
+                return True
+
             return await self.firestore.update_user(user_id, update_data)
 
         except Exception as e:
@@ -173,4 +215,5 @@ class UserService:
 
     async def cleanup(self):
         """Cleanup resources"""
+        self._crypto_pool.shutdown(wait=False)
         logger.info("🧹 User service cleaned up")
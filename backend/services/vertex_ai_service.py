@@ -1,355 +1,158 @@
 # backend/services/vertex_ai_service.py
 import vertexai
 from vertexai.generative_models import GenerativeModel, Part, FinishReason
+from vertexai.language_models import TextEmbeddingModel
 import vertexai.preview.generative_models as generative_models
 from google.cloud import aiplatform
+import copy
+import hashlib
 import json
+import logging
+import re
 import asyncio
+import textwrap
 import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 import structlog
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from google.api_core.exceptions import DeadlineExceeded, InternalServerError, ServiceUnavailable
 import os
 from google.oauth2 import service_account
 from backend.models.configs import Settings
+from backend.utils.cache import SemanticCache, get_cache, stable_fields
 
-logger = structlog.get_logger()
-
-
-class VertexAIService:
-    """Service for Vertex AI operations using Gemini models"""
-
-    def __init__(self, settings: Settings):
-        self.settings = settings
-        self.project_id = settings.GOOGLE_CLOUD_PROJECT
-        self.location = settings.VERTEX_AI_LOCATION
-
-        # Initialize Vertex AI with proper authentication
-        try:
-            # Check if service account file exists
-            service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-            if service_account_path and os.path.exists(service_account_path):
-                # Use service account file
-                credentials = service_account.Credentials.from_service_account_file(
-                    service_account_path
-                )
-                vertexai.init(
-                    project=self.project_id,
-                    location=self.location,
-                    credentials=credentials
-                )
-                logger.info("✅ Using service account credentials for Vertex AI")
-            else:
-                # Use default application credentials (from gcloud auth application-default login)
-                vertexai.init(project=self.project_id, location=self.location)
-                logger.info("✅ Using default application credentials for Vertex AI")
-        except Exception as e:
-            logger.error("❌ Failed to initialize Vertex AI with credentials", error=str(e))
-            # Fallback to default initialization
-            vertexai.init(project=self.project_id, location=self.location)
-
-        # Initialize models
-        self.gemini_pro = GenerativeModel("gemini-1.5-pro")
-        self.gemini_flash = GenerativeModel("gemini-1.5-flash")
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
 
-        # Safety settings for financial advice
-        self.safety_settings = {
-            generative_models.HarmCategory.HARM_CATEGORY_HATE_SPEECH:
-                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            generative_models.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT:
-                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            generative_models.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT:
-                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-            generative_models.HarmCategory.HARM_CATEGORY_HARASSMENT:
-                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-        }
-
-        # Generation configs
-        self.pro_config = {
-            "max_output_tokens": 4096,
-            "temperature": 0.3,
-            "top_p": 0.8,
-            "top_k": 40,
-        }
-
-        self.flash_config = {
-            "max_output_tokens": 2048,
-            "temperature": 0.2,
-            "top_p": 0.9,
-            "top_k": 40,
-        }
-
-        logger.info("✅ Vertex AI service initialized",
-                    project=self.project_id,
-                    location=self.location)
-
-    async def health_check(self) -> Dict[str, Any]:
-        """Check Vertex AI service health"""
-        try:
-            start_time = time.time()
-
-            test_prompt = "Respond with 'Service operational' if you can process this request."
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                test_prompt,
-                generation_config={"max_output_tokens": 50, "temperature": 0}
-            )
-
-            response_time = (time.time() - start_time) * 1000
-
-            if "operational" in response.text.lower():
-                return {
-                    "status": "healthy",
-                    "response_time": response_time,
-                    "last_check": datetime.now()
-                }
-            else:
-                return {
-                    "status": "degraded",
-                    "response_time": response_time,
-                    "last_check": datetime.now(),
-                    "message": "Unexpected response"
-                }
-
-        except Exception as e:
-            logger.error("❌ Vertex AI health check failed", error=str(e))
-            return {
-                "status": "unhealthy",
-                "last_check": datetime.now(),
-                "error": str(e)
-            }
-
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-    async def analyze_financial_decision(self, decision_request) -> Dict[str, Any]:
-        """Analyze financial decision using Gemini Pro"""
-        logger.info("🎯 Analyzing financial decision with Gemini Pro",
-                    amount=decision_request.amount,
-                    category=decision_request.category)
-
-        # Create comprehensive analysis prompt
-        prompt = self._create_decision_analysis_prompt(decision_request)
+logger = structlog.get_logger()
 
-        try:
-            start_time = time.time()
+# Level gate for per-request debug events
+_stdlib_logger = logging.getLogger(__name__)
 
-            response = await asyncio.to_thread(
-                self.gemini_pro.generate_content,
-                prompt,
-                generation_config=self.pro_config,
-                safety_settings=self.safety_settings
-            )
+# Response cache TTLs: analyses of a fixed profile are stable, conversational and live-data answers go stale sooner
+ANALYSIS_RESPONSE_TTL = 6 * 3600
+CHAT_RESPONSE_TTL = 3600
+LIVE_DATA_RESPONSE_TTL = 30  # about three health-stream ticks
 
-            processing_time = (time.time() - start_time) * 1000
+# Paraphrased chat questions reuse an answer given in the same context; fuzzy matches expire sooner than exact ones
+EMBEDDING_MODEL = "text-embedding-004"
+SEMANTIC_CHAT_TTL = 300
 
-            # Parse and validate response
-            parsed_response = self._parse_json_response(response.text)
+# Amounts embed almost identically ("₹50k" vs "₹5 lakh"), so they must match exactly for a semantic hit
+_AMOUNT_PATTERN = re.compile(r"\d[\d,.]*\s*(?:k|lakhs?|lacs?|cr|crores?|m|mn|million)?\b", re.IGNORECASE)
 
-            # Add metadata
-            parsed_response.update({
-                "processing_time_ms": processing_time,
-                "model_used": "gemini-1.5-pro",
-                "analysis_timestamp": datetime.now().isoformat()
-            })
+# Only transient server-side failures are retried; auth and quota errors fail fast to the fallback
+TRANSIENT_VERTEX_ERRORS = (ServiceUnavailable, DeadlineExceeded, InternalServerError)
 
-            logger.info("✅ Decision analysis completed",
-                        score=parsed_response.get("score", "unknown"),
-                        processing_time=f"{processing_time:.1f}ms")
+# Sampled (high-temperature) generations are meant to vary and are never cached
+MAX_CACHEABLE_TEMPERATURE = 0.5
 
-            return parsed_response
+# Rule-based fallback scoring buckets for decision analysis
+FALLBACK_FAVOURED_CATEGORIES = frozenset({"investment", "education", "health", "insurance"})
+FALLBACK_DISCRETIONARY_CATEGORIES = frozenset({"entertainment", "luxury", "gaming"})
 
-        except Exception as e:
-            logger.error("❌ Decision analysis failed", error=str(e))
-            return self._generate_fallback_decision_analysis(decision_request)
+_JSON_DECODER = json.JSONDecoder()
 
-    async def calculate_financial_health_score(self, financial_data: Dict[str, Any]) -> int:
-        """Calculate comprehensive financial health score"""
-        logger.info("🏥 Calculating financial health score")
+_today_cache = (-1, "")
 
-        prompt = self._create_health_score_prompt(financial_data)
 
-        try:
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                prompt,
-                generation_config=self.flash_config,
-                safety_settings=self.safety_settings
-            )
+@lru_cache(maxsize=None)
+def _load_credentials(path: str, mtime: float) -> service_account.Credentials:
+    """Parsed service account key; a rotated file (new mtime) is read again"""
+    return service_account.Credentials.from_service_account_file(path)
 
-            parsed_response = self._parse_json_response(response.text)
-            health_score = parsed_response.get("health_score", 50)
 
-            logger.info("✅ Health score calculated", score=health_score)
-            return max(0, min(100, health_score))
+@lru_cache(maxsize=None)
+def _get_models(project: str, location: str,
+                credentials: Optional[service_account.Credentials]) -> Tuple[GenerativeModel, GenerativeModel]:
+    """Process-wide Gemini pro and flash models, so service instances reuse their async clients"""
+    vertexai.init(project=project, location=location, credentials=credentials)
+    return GenerativeModel("gemini-1.5-pro"), GenerativeModel("gemini-1.5-flash")
 
-        except Exception as e:
-            logger.error("❌ Health score calculation failed", error=str(e))
-            return self._calculate_basic_health_score(financial_data)
 
-    async def generate_dashboard_insights(self, financial_data: Dict[str, Any]) -> List[str]:
-        """Generate insights for dashboard"""
-        logger.info("💡 Generating dashboard insights")
+@lru_cache(maxsize=None)
+def _get_embedding_model(project: str, location: str) -> TextEmbeddingModel:
+    """Process-wide query embedding model for the semantic cache"""
+    return TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL)
 
-        prompt = self._create_insights_prompt(financial_data)
 
-        try:
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                prompt,
-                generation_config=self.flash_config,
-                safety_settings=self.safety_settings
-            )
+def _prompt_json(obj: Any) -> str:
+    """Compact JSON for prompt bodies, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"), default=str)
 
-            parsed_response = self._parse_json_response(response.text)
-            insights = parsed_response.get("insights", [])
 
-            logger.info("✅ Dashboard insights generated", count=len(insights))
-            return insights
+def _today() -> str:
+    """Current date for prompts, re-rendered at most once a minute"""
+    global _today_cache
+    minute = int(time.time()) // 60
+    if _today_cache[0] != minute:
+        _today_cache = (minute, datetime.now().strftime('%Y-%m-%d'))
+    return _today_cache[1]
 
-        except Exception as e:
-            logger.error("❌ Insights generation failed", error=str(e))
-            return self._generate_fallback_insights(financial_data)
 
-    async def calculate_real_time_health(self, current_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Calculate real-time health metrics"""
-        try:
-            prompt = f"""
-            Analyze this real-time financial data and provide health metrics:
+# Prompt skeletons are module constants; each request only fills the dynamic slots. They are dedented
+# and embed compact JSON, since every indentation byte is uploaded and billed as input tokens
+REAL_TIME_MONITOR_PROMPT = textwrap.dedent("""
+            Analyze this real-time financial data. Provide health metrics and detect anomalies
+            (unusual spending, income irregularities, investment volatility, balance anomalies):
 
-            Data: {json.dumps(current_data, indent=2)}
+            Data: {data}
 
             Provide response in JSON:
             {{
-                "score": 75,
-                "metrics": {{
-                    "liquidity": 80,
-                    "debt_ratio": 60,
-                    "spending_trend": 70,
-                    "investment_performance": 85
+                "health": {{
+                    "score": 75,
+                    "metrics": {{
+                        "liquidity": 80,
+                        "debt_ratio": 60,
+                        "spending_trend": 70,
+                        "investment_performance": 85
+                    }},
+                    "alerts": [
+                        {{
+                            "type": "warning|info|critical",
+                            "message": "Alert message",
+                            "action": "Suggested action"
+                        }}
+                    ],
+                    "trends": {{
+                        "net_worth": "increasing|decreasing|stable",
+                        "spending": "increasing|decreasing|stable",
+                        "income": "increasing|decreasing|stable"
+                    }}
                 }},
-                "alerts": [
+                "anomalies": [
                     {{
-                        "type": "warning|info|critical",
-                        "message": "Alert message",
-                        "action": "Suggested action"
+                        "type": "spending|income|investment|balance",
+                        "severity": "low|medium|high|critical",
+                        "description": "What was detected",
+                        "value": 15000,
+                        "threshold": 10000,
+                        "recommendation": "What to do about it",
+                        "confidence": 0.85
                     }}
-                ],
-                "trends": {{
-                    "net_worth": "increasing|decreasing|stable",
-                    "spending": "increasing|decreasing|stable",
-                    "income": "increasing|decreasing|stable"
-                }}
+                ]
             }}
-            """
-
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                prompt,
-                generation_config=self.flash_config
-            )
-
-            return self._parse_json_response(response.text)
-
-        except Exception as e:
-            logger.error("❌ Real-time health calculation failed", error=str(e))
-            return self._generate_basic_real_time_health(current_data)
-
-    async def detect_financial_anomalies(self, current_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Detect financial anomalies and unusual patterns"""
-        try:
-            prompt = f"""
-            Analyze this financial data for anomalies and unusual patterns:
+            """)
 
-            Data: {json.dumps(current_data, indent=2)}
 
-            Look for:
-            - Unusual spending patterns
-            - Income irregularities  
-            - Investment volatility
-            - Account balance anomalies
-
-            Return JSON array of anomalies:
-            [
-                {{
-                    "type": "spending|income|investment|balance",
-                    "severity": "low|medium|high|critical",
-                    "description": "What was detected",
-                    "value": 15000,
-                    "threshold": 10000,
-                    "recommendation": "What to do about it",
-                    "confidence": 0.85
-                }}
-            ]
-            """
-
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                prompt,
-                generation_config=self.flash_config
-            )
-
-            parsed_response = self._parse_json_response(response.text)
-            return parsed_response if isinstance(parsed_response, list) else []
-
-        except Exception as e:
-            logger.error("❌ Anomaly detection failed", error=str(e))
-            return []
-
-    async def generate_chat_response(self, message: str, financial_context: Dict[str, Any],
-                                     conversation_history: List[Dict[str, str]] = None,
-                                     user_preferences: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Generate conversational response for chat"""
-        logger.info("💬 Generating chat response", message_length=len(message))
-
-        prompt = self._create_chat_prompt(message, financial_context, conversation_history, user_preferences)
-
-        try:
-            response = await asyncio.to_thread(
-                self.gemini_flash.generate_content,
-                prompt,
-                generation_config=self.flash_config,
-                safety_settings=self.safety_settings
-            )
-
-            parsed_response = self._parse_json_response(response.text)
-
-            # Ensure required fields
-            parsed_response.setdefault("response", "I'm here to help with your financial questions.")
-            parsed_response.setdefault("suggestions", [])
-            parsed_response.setdefault("charts", [])
-            parsed_response.setdefault("confidence", 0.8)
-            parsed_response.setdefault("requires_action", False)
-            parsed_response.setdefault("actions", [])
-
-            logger.info("✅ Chat response generated")
-            return parsed_response
-
-        except Exception as e:
-            logger.error("❌ Chat response generation failed", error=str(e))
-            return {
-                "response": "I'm experiencing some technical difficulties. Please try rephrasing your question.",
-                "suggestions": ["What's my current net worth?", "Show me my spending trends",
-                                "How can I save more money?"],
-                "charts": [],
-                "confidence": 0.5,
-                "requires_action": False,
-                "actions": []
-            }
-
-    # Private helper methods for prompt creation
-    def _create_decision_analysis_prompt(self, decision_request) -> str:
-        """Create comprehensive decision analysis prompt"""
-        return f"""
+DECISION_ANALYSIS_PROMPT = textwrap.dedent("""
         You are AvestoAI, a revolutionary financial intelligence advisor. Analyze this financial decision comprehensively.
 
         DECISION DETAILS:
-        - Description: {decision_request.description}
-        - Amount: ₹{decision_request.amount:,}
-        - Category: {decision_request.category}
-        - Financing Method: {decision_request.financing_method}
-        - User Context: {json.dumps(decision_request.user_context, indent=2)}
+        - Description: {description}
+        - Amount: ₹{amount:,}
+        - Category: {category}
+        - Financing Method: {financing_method}
+        - User Context: {user_context}
 
-        Current Date: {datetime.now().strftime('%Y-%m-%d')}
+        Current Date: {current_date}
 
         ANALYSIS FRAMEWORK:
         Provide detailed analysis in JSON format:
@@ -410,15 +213,14 @@ class VertexAIService:
 
         Consider: affordability, opportunity cost, goal alignment, market timing, risk factors, and personal circumstances.
         Provide specific numbers and calculations wherever possible.
-        """
+        """)
 
-    def _create_health_score_prompt(self, financial_data: Dict[str, Any]) -> str:
-        """Create financial health score calculation prompt"""
-        return f"""
+
+HEALTH_SCORE_PROMPT = textwrap.dedent("""
         Calculate comprehensive financial health score for this user:
 
         FINANCIAL DATA:
-        {json.dumps(financial_data, indent=2)}
+        {financial_data}
 
         HEALTH SCORE CALCULATION:
         Provide response in JSON:
@@ -455,15 +257,14 @@ class VertexAIService:
         - Spending discipline & budgeting: 10%
 
         Score Range: 0-100 where 100 is optimal financial health.
-        """
+        """)
 
-    def _create_insights_prompt(self, financial_data: Dict[str, Any]) -> str:
-        """Create dashboard insights generation prompt"""
-        return f"""
+
+INSIGHTS_PROMPT = textwrap.dedent("""
         Generate actionable financial insights for dashboard:
 
         FINANCIAL DATA:
-        {json.dumps(financial_data, indent=2)}
+        {financial_data}
 
         Generate insights in JSON:
         {{
@@ -487,27 +288,17 @@ class VertexAIService:
         - Focus on most impactful insights
         - Use encouraging but realistic tone
         - Limit to 5-7 insights maximum
-        """
+        """)
 
-    def _create_chat_prompt(self, message: str, financial_context: Dict[str, Any],
-                            conversation_history: List[Dict[str, str]] = None,
-                            user_preferences: Dict[str, Any] = None) -> str:
-        """Create conversational chat prompt"""
-
-        # Build conversation context
-        context = ""
-        if conversation_history:
-            for turn in conversation_history[-5:]:  # Last 5 turns
-                context += f"User: {turn.get('user', '')}\nAI: {turn.get('ai', '')}\n"
 
-        return f"""
+CHAT_PROMPT = textwrap.dedent("""
         You are AvestoAI, a revolutionary financial intelligence assistant. Respond naturally and helpfully.
 
         USER'S FINANCIAL CONTEXT:
-        {json.dumps(financial_context, indent=2)}
+        {financial_context}
 
         USER PREFERENCES:
-        {json.dumps(user_preferences or {}, indent=2)}
+        {user_preferences}
 
         RECENT CONVERSATION:
         {context}
@@ -554,9 +345,397 @@ class VertexAIService:
         - Stay focused on financial topics
         - Use encouraging but realistic tone
         - Provide actionable next steps
-        """
+        """)
+
+
+class VertexAIService:
+    """Service for Vertex AI operations using Gemini models"""
+
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.project_id = settings.GOOGLE_CLOUD_PROJECT
+        self.location = settings.VERTEX_AI_LOCATION
+
+        # Initialize Vertex AI with proper authentication; models are shared by every service instance
+        try:
+            # Check if service account file exists
+            service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+            if service_account_path and os.path.exists(service_account_path):
+                # Use service account file
+                credentials = _load_credentials(service_account_path, os.path.getmtime(service_account_path))
+                self.gemini_pro, self.gemini_flash = _get_models(self.project_id, self.location, credentials)
+                logger.info("✅ Using service account credentials for Vertex AI")
+            else:
+                # Use default application credentials (from gcloud auth application-default login)
+                self.gemini_pro, self.gemini_flash = _get_models(self.project_id, self.location, None)
+                logger.info("✅ Using default application credentials for Vertex AI")
+        except Exception as e:
+            logger.error("❌ Failed to initialize Vertex AI with credentials", error=str(e))
+            # Fallback to default initialization
+            self.gemini_pro, self.gemini_flash = _get_models(self.project_id, self.location, None)
+
+        # Parsed responses are cached by prompt hash
+        self.cache = get_cache(settings.REDIS_URL, settings.CACHE_TTL)
+
+        # Native async gRPC calls, capped at VERTEX_AI_CONCURRENCY in flight; identical prompts share one call
+        self._request_slots = asyncio.Semaphore(settings.VERTEX_AI_CONCURRENCY)
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+        # Embedding model is loaded on the first semantic lookup
+        self.semantic_cache = SemanticCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD, ttl=SEMANTIC_CHAT_TTL
+        ) if settings.ENABLE_SEMANTIC_CACHE else None
+        self._embedding_model: Optional[TextEmbeddingModel] = None
+
+        # Safety settings for financial advice
+        self.safety_settings = {
+            generative_models.HarmCategory.HARM_CATEGORY_HATE_SPEECH:
+                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            generative_models.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT:
+                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            generative_models.HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT:
+                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+            generative_models.HarmCategory.HARM_CATEGORY_HARASSMENT:
+                generative_models.HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+        }
+
+        # Generation configs
+        self.pro_config = {
+            "max_output_tokens": 4096,
+            "temperature": 0.3,
+            "top_p": 0.8,
+            "top_k": 40,
+        }
+
+        self.flash_config = {
+            "max_output_tokens": 2048,
+            "temperature": 0.2,
+            "top_p": 0.9,
+            "top_k": 40,
+        }
+
+        logger.info("✅ Vertex AI service initialized",
+                    project=self.project_id,
+                    location=self.location)
+
+    async def health_check(self) -> Dict[str, Any]:
+        """Check Vertex AI service health"""
+        try:
+            start_time = time.time()
+
+            test_prompt = "Respond with 'Service operational' if you can process this request."
+            response = await self.gemini_flash.generate_content_async(
+                test_prompt,
+                generation_config={"max_output_tokens": 50, "temperature": 0}
+            )
+
+            response_time = (time.time() - start_time) * 1000
+
+            if "operational" in response.text.lower():
+                return {
+                    "status": "healthy",
+                    "response_time": response_time,
+                    "last_check": datetime.now()
+                }
+            else:
+                return {
+                    "status": "degraded",
+                    "response_time": response_time,
+                    "last_check": datetime.now(),
+                    "message": "Unexpected response"
+                }
+
+        except Exception as e:
+            logger.error("❌ Vertex AI health check failed", error=str(e))
+            return {
+                "status": "unhealthy",
+                "last_check": datetime.now(),
+                "error": str(e)
+            }
+
+    async def analyze_financial_decision(self, decision_request) -> Dict[str, Any]:
+        """Analyze financial decision using Gemini Pro"""
+        if _stdlib_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Analyzing financial decision with Gemini Pro",
+                         amount=decision_request.amount,
+                         category=decision_request.category)
+
+        # Create comprehensive analysis prompt
+        prompt = self._create_decision_analysis_prompt(decision_request)
+
+        try:
+            start_time = time.time()
+
+            # Parse and validate response
+            parsed_response = await self._cached_generate(
+                self.gemini_pro, "gemini-1.5-pro", prompt, self.pro_config, ANALYSIS_RESPONSE_TTL,
+                safety_settings=self.safety_settings
+            )
+
+            processing_time = (time.time() - start_time) * 1000
+
+            # Add metadata
+            parsed_response.update({
+                "processing_time_ms": processing_time,
+                "model_used": "gemini-1.5-pro",
+                "analysis_timestamp": datetime.now().isoformat()
+            })
+
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Decision analysis completed",
+                             score=parsed_response.get("score", "unknown"),
+                             processing_time=f"{processing_time:.1f}ms")
+
+            return parsed_response
+
+        except Exception as e:
+            logger.error("❌ Decision analysis failed", error=str(e))
+            return self._generate_fallback_decision_analysis(decision_request)
+
+    async def calculate_financial_health_score(self, financial_data: Dict[str, Any]) -> int:
+        """Calculate comprehensive financial health score"""
+        prompt = self._create_health_score_prompt(financial_data)
+
+        try:
+            parsed_response = await self._cached_generate(
+                self.gemini_flash, "gemini-1.5-flash", prompt, self.flash_config, ANALYSIS_RESPONSE_TTL,
+                safety_settings=self.safety_settings
+            )
+            health_score = parsed_response.get("health_score", 50)
+
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Health score calculated", score=health_score)
+            return max(0, min(100, health_score))
+
+        except Exception as e:
+            logger.error("❌ Health score calculation failed", error=str(e))
+            return self._calculate_basic_health_score(financial_data)
+
+    async def generate_dashboard_insights(self, financial_data: Dict[str, Any]) -> List[str]:
+        """Generate insights for dashboard"""
+        prompt = self._create_insights_prompt(financial_data)
+
+        try:
+            parsed_response = await self._cached_generate(
+                self.gemini_flash, "gemini-1.5-flash", prompt, self.flash_config, ANALYSIS_RESPONSE_TTL,
+                safety_settings=self.safety_settings
+            )
+            insights = parsed_response.get("insights", [])
+
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Dashboard insights generated", count=len(insights))
+            return insights
+
+        except Exception as e:
+            logger.error("❌ Insights generation failed", error=str(e))
+            return self._generate_fallback_insights(financial_data)
+
+    async def monitor_real_time_data(self, current_data: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Real-time health metrics and anomalies for one user from a single model call"""
+        try:
+            # Fetch stamps are left out of the prompt so an unchanged snapshot maps to the same cache key
+            prompt = REAL_TIME_MONITOR_PROMPT.format(data=_prompt_json(stable_fields(current_data)))
+
+            parsed_response = await self._cached_generate(
+                self.gemini_flash, "gemini-1.5-flash", prompt, self.flash_config, LIVE_DATA_RESPONSE_TTL
+            )
+            health = parsed_response.get("health")
+            anomalies = parsed_response.get("anomalies")
+
+            if not isinstance(health, dict):
+                health = self._generate_basic_real_time_health(current_data)
+            return health, anomalies if isinstance(anomalies, list) else []
+
+        except Exception as e:
+            logger.error("❌ Real-time monitoring failed", error=str(e))
+            return self._generate_basic_real_time_health(current_data), []
+
+    async def generate_chat_response(self, message: str, financial_context: Dict[str, Any],
+                                     conversation_history: List[Dict[str, str]] = None,
+                                     user_preferences: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Generate conversational response for chat"""
+        if _stdlib_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generating chat response", message_length=len(message))
+
+        prompt = self._create_chat_prompt(message, financial_context, conversation_history, user_preferences)
+
+        # Only opening questions are matched by meaning: history changes every turn, so later turns would
+        # pay an embedding call for a near-certain miss. Similar questions share an answer only when the
+        # context, preferences and every amount mentioned are identical.
+        semantic_key = None
+        if not conversation_history:
+            amounts = "|".join(re.sub(r"[\s,]", "", m).lower() for m in _AMOUNT_PATTERN.findall(message))
+            namespace = hashlib.sha256(
+                (self._create_chat_prompt("", financial_context, None, user_preferences) + amounts).encode()
+            ).hexdigest()
+            semantic_key = (namespace, message)
+
+        try:
+            parsed_response = await self._cached_generate(
+                self.gemini_flash, "gemini-1.5-flash", prompt, self.flash_config, CHAT_RESPONSE_TTL,
+                safety_settings=self.safety_settings, semantic_key=semantic_key
+            )
+
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Chat response generated")
+            return self._complete_chat_response(parsed_response)
+
+        except Exception as e:
+            logger.error("❌ Chat response generation failed", error=str(e))
+            return self._generate_fallback_chat_response()
+
+    async def stream_chat_response(self, message: str, financial_context: Dict[str, Any],
+                                   conversation_history: List[Dict[str, str]] = None,
+                                   user_preferences: Dict[str, Any] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a chat reply as text chunks, followed by the parsed response"""
+        if _stdlib_logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Streaming chat response", message_length=len(message))
+
+        prompt = self._create_chat_prompt(message, financial_context, conversation_history, user_preferences)
+
+        try:
+            chunks = []
+            async for text in self._stream_generate(self.gemini_flash, prompt, self.flash_config,
+                                                    safety_settings=self.safety_settings):
+                chunks.append(text)
+                yield {"type": "chunk", "text": text}
+
+            chat_response = self._complete_chat_response(self._parse_json_response("".join(chunks)))
+            if _stdlib_logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Chat response streamed", chunks=len(chunks))
+
+        except Exception as e:
+            logger.error("❌ Chat response streaming failed", error=str(e))
+            chat_response = self._generate_fallback_chat_response()
+
+        yield {"type": "complete", "response": chat_response}
+
+    # Private helper methods for prompt creation
+    def _create_decision_analysis_prompt(self, decision_request) -> str:
+        """Create comprehensive decision analysis prompt"""
+        return DECISION_ANALYSIS_PROMPT.format(
+            description=decision_request.description,
+            amount=decision_request.amount,
+            category=decision_request.category,
+            financing_method=decision_request.financing_method,
+            user_context=_prompt_json(decision_request.user_context),
+            current_date=_today()
+        )
+
+    def _create_health_score_prompt(self, financial_data: Dict[str, Any]) -> str:
+        """Create financial health score calculation prompt"""
+        return HEALTH_SCORE_PROMPT.format(financial_data=_prompt_json(stable_fields(financial_data)))
+
+    def _create_insights_prompt(self, financial_data: Dict[str, Any]) -> str:
+        """Create dashboard insights generation prompt"""
+        return INSIGHTS_PROMPT.format(financial_data=_prompt_json(stable_fields(financial_data)))
+
+    def _create_chat_prompt(self, message: str, financial_context: Dict[str, Any],
+                            conversation_history: List[Dict[str, str]] = None,
+                            user_preferences: Dict[str, Any] = None) -> str:
+        """Create conversational chat prompt"""
+
+        # Build conversation context
+        context = "".join(
+            f"User: {turn.get('user', '')}\nAI: {turn.get('ai', '')}\n"
+            for turn in (conversation_history or [])[-5:]  # Last 5 turns
+        )
+
+        return CHAT_PROMPT.format(
+            financial_context=_prompt_json(financial_context),
+            user_preferences=_prompt_json(user_preferences or {}),
+            context=context,
+            message=message
+        )
 
     # Utility methods
+    async def _cached_generate(self, model: GenerativeModel, model_name: str, prompt: str,
+                               generation_config: Dict[str, Any], ttl: int,
+                               safety_settings: Optional[Dict[Any, Any]] = None,
+                               semantic_key: Optional[Tuple[str, str]] = None) -> Any:
+        """Generate and parse a JSON response, reusing a cached one for an identical or (with semantic_key) similar request"""
+        if generation_config.get("temperature", 0) > MAX_CACHEABLE_TEMPERATURE:
+            return await self._generate_parsed(model, prompt, generation_config, safety_settings)
+
+        cache_key = "vai:" + hashlib.sha256(
+            (model_name + prompt + json.dumps(generation_config, sort_keys=True)).encode()
+        ).hexdigest()
+
+        # The cache returns an independent copy
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Singleflight: concurrent callers with the same key await the first caller's request
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            return copy.deepcopy(await asyncio.shield(task))
+
+        # semantic_key is (namespace, query text): only the query is embedded, and only within an identical namespace
+        embedding = None
+        if semantic_key is not None and self.semantic_cache is not None:
+            embedding = await self._embed(semantic_key[1])
+            if embedding is not None:
+                similar = self.semantic_cache.get(semantic_key[0], embedding)
+                if similar is not None:
+                    return copy.deepcopy(similar)
+
+        task = asyncio.ensure_future(self._generate_parsed(model, prompt, generation_config, safety_settings))
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(cache_key, None))
+        parsed_response = await asyncio.shield(task)
+
+        # Unparseable output is not worth replaying
+        if not (isinstance(parsed_response, dict) and "error" in parsed_response):
+            await self.cache.set(cache_key, parsed_response, ttl)
+            if embedding is not None:
+                self.semantic_cache.set(semantic_key[0], embedding, copy.deepcopy(parsed_response))
+
+        return parsed_response
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """Embedding of a query for semantic cache lookups, or None if the embedding call fails"""
+        try:
+            if self._embedding_model is None:
+                self._embedding_model = await asyncio.to_thread(_get_embedding_model, self.project_id, self.location)
+            embeddings = await self._embedding_model.get_embeddings_async([text])
+            return embeddings[0].values
+        except Exception as e:
+            logger.warning("⚠️ Query embedding failed, skipping semantic cache", error=str(e))
+            return None
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential_jitter(initial=0.2, max=4, jitter=0.5),
+           retry=retry_if_exception_type(TRANSIENT_VERTEX_ERRORS), reraise=True)
+    async def _generate_parsed(self, model: GenerativeModel, prompt: str, generation_config: Dict[str, Any],
+                               safety_settings: Optional[Dict[Any, Any]]) -> Any:
+        """Call Gemini over the model's async gRPC client and parse its JSON"""
+        async with self._request_slots:
+            response = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                safety_settings=safety_settings
+            )
+        return self._parse_json_response(response.text)
+
+    async def _stream_generate(self, model: GenerativeModel, prompt: str, generation_config: Dict[str, Any],
+                               safety_settings: Optional[Dict[Any, Any]] = None) -> AsyncIterator[str]:
+        """Yield response text as Gemini streams it"""
+        async with self._request_slots:
+            responses = await model.generate_content_async(
+                prompt,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                stream=True
+            )
+            try:
+                async for chunk in responses:
+                    yield chunk.text
+            finally:
+                # On early exit (e.g. a client disconnect) close the SDK's response generator so it stops
+                # consuming chunks and the request slot is released; the SDK does not expose the
+                # underlying call to cancel it explicitly
+                await responses.aclose()
+
     def _parse_json_response(self, response_text: str) -> Dict[str, Any]:
         """Parse JSON from AI response"""
         try:
@@ -565,8 +744,14 @@ class VertexAIService:
             end = response_text.rfind('}') + 1
 
             if start >= 0 and end > start:
-                json_str = response_text[start:end]
-                parsed = json.loads(json_str)
+                # Common case: the outermost braces span exactly one object
+                if orjson is not None:
+                    try:
+                        return orjson.loads(response_text[start:end])
+                    except orjson.JSONDecodeError:
+                        pass
+                # Text after the object (e.g. a trailing note with braces): decode the first object only
+                parsed, _ = _JSON_DECODER.raw_decode(response_text, start)
                 return parsed
             else:
                 logger.warning("No JSON found in response", response_preview=response_text[:200])
@@ -621,9 +806,9 @@ class VertexAIService:
         # Simple rule-based scoring
         base_score = 50
 
-        if category in ["investment", "education", "health", "insurance"]:
+        if category in FALLBACK_FAVOURED_CATEGORIES:
             base_score += 20
-        elif category in ["entertainment", "luxury", "gaming"]:
+        elif category in FALLBACK_DISCRETIONARY_CATEGORIES:
             base_score -= 20
 
         if amount > 100000:
@@ -663,6 +848,28 @@ class VertexAIService:
             "Regular investment reviews can help optimize your portfolio performance."
         ]
 
+    def _complete_chat_response(self, parsed_response: Dict[str, Any]) -> Dict[str, Any]:
+        """Ensure required chat fields"""
+        parsed_response.setdefault("response", "I'm here to help with your financial questions.")
+        parsed_response.setdefault("suggestions", [])
+        parsed_response.setdefault("charts", [])
+        parsed_response.setdefault("confidence", 0.8)
+        parsed_response.setdefault("requires_action", False)
+        parsed_response.setdefault("actions", [])
+        return parsed_response
+
+    def _generate_fallback_chat_response(self) -> Dict[str, Any]:
+        """Generate fallback chat response"""
+        return {
+            "response": "I'm experiencing some technical difficulties. Please try rephrasing your question.",
+            "suggestions": ["What's my current net worth?", "Show me my spending trends",
+                            "How can I save more money?"],
+            "charts": [],
+            "confidence": 0.5,
+            "requires_action": False,
+            "actions": []
+        }
+
     def _generate_basic_real_time_health(self, current_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate basic real-time health metrics"""
         return {
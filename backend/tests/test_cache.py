@@ -0,0 +1,71 @@
+# backend/tests/test_cache.py
+import asyncio
+from datetime import datetime
+from backend.utils.cache import CacheService
+
+
+def test_local_cache_roundtrip_and_invalidation():
+    """In-process cache returns stored values until invalidated"""
+    cache = CacheService(redis_url=None, default_ttl=60)
+
+    async def scenario():
+        await cache.set("user:u1:profile", {"user_id": "u1"})
+        hit = await cache.get("user:u1:profile")
+        await cache.delete("user:u1:profile")
+        return hit, await cache.get("user:u1:profile")
+
+    hit, miss = asyncio.run(scenario())
+    assert hit == {"user_id": "u1"}
+    assert miss is None
+
+
+def test_local_cache_isolates_callers_from_stored_value():
+    """Mutating a stored or returned profile leaves the cached entry intact, as with Redis"""
+    cache = CacheService(redis_url=None, default_ttl=60)
+    profile = {"user_id": "u1", "preferences": {"theme": "dark"}}
+
+    async def scenario():
+        await cache.set("user:u1:profile", profile)
+        profile["preferences"]["theme"] = "light"
+        (await cache.get("user:u1:profile"))["preferences"]["language"] = "hi"
+        return await cache.get("user:u1:profile")
+
+    assert asyncio.run(scenario()) == {"user_id": "u1", "preferences": {"theme": "dark"}}
+
+
+def test_local_cache_expires_entries():
+    """Entries are dropped once their TTL has elapsed"""
+    cache = CacheService(redis_url=None, default_ttl=60)
+
+    async def scenario():
+        await cache.set("user:u1:fin_state", {"net_worth": 1}, ttl=-1)
+        return await cache.get("user:u1:fin_state")
+
+    assert asyncio.run(scenario()) is None
+
+
+class FakeRedis:
+    """Minimal async Redis with decode_responses=True semantics"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value.decode() if isinstance(value, bytes) else value
+
+
+def test_redis_cache_serializes_firestore_values():
+    """Redis-backed entries round-trip as JSON, with datetimes restored as in the local cache"""
+    cache = CacheService(redis_url=None, default_ttl=60)
+    cache.redis = FakeRedis()
+
+    async def scenario():
+        await cache.set("user:u1:profile", {"user_id": "u1", "created_at": datetime(2024, 1, 2, 3, 4, 5), "goals": {}})
+        return await cache.get("user:u1:profile")
+
+    user = asyncio.run(scenario())
+    assert user["user_id"] == "u1" and user["goals"] == {}
+    assert user["created_at"] == datetime(2024, 1, 2, 3, 4, 5)
@@ -0,0 +1,101 @@
+# backend/tests/test_fi_mcp_service.py
+import pytest
+import asyncio
+import json
+from backend.services.fi_mcp_service import FiMCPService, BankTx, MFTx
+from backend.models.configs import Settings
+
+
+MCP_RESPONSES = {
+    "fetch_net_worth": {"result": {"netWorthResponse": {
+        "assetValues": [
+            {"netWorthAttribute": "ASSET_TYPE_SAVINGS_ACCOUNTS", "value": {"units": "100000", "nanos": 500000000}},
+            {"netWorthAttribute": "ASSET_TYPE_MUTUAL_FUND", "value": {"units": "250000"}}
+        ],
+        "liabilityValues": [
+            {"netWorthAttribute": "LIABILITY_TYPE_VEHICLE_LOAN", "value": {"units": "30000"}}
+        ],
+        "totalNetWorthValue": {"units": "320000", "nanos": 500000000}
+    }}},
+    "fetch_credit_report": {"result": {}},
+    "fetch_epf_details": {"result": {}},
+    "fetch_mf_transactions": {"result": {"transactions": [
+        {"isinNumber": "INF1", "schemeName": "Index Fund", "transactionDate": "2024-01-05",
+         "transactionAmount": {"units": "1000"}, "transactionUnits": "10", "purchasePrice": "100",
+         "externalOrderType": "BUY"},
+        {"isinNumber": "INF1", "schemeName": "Index Fund", "transactionDate": "2024-02-05",
+         "transactionAmount": {"units": "500"}, "transactionUnits": "4", "purchasePrice": "125",
+         "externalOrderType": "SELL"}
+    ]}},
+    "fetch_bank_transactions": {"result": {"transactions": [
+        {"transactionAmount": {"units": "50000"}, "narration": "SALARY CREDIT",
+         "transactionDate": "2024-01-01T00:00:00Z", "currentBalance": {"units": "60000"}},
+        {"transactionAmount": {"units": "-500", "nanos": -500000000}, "narration": "Swiggy order",
+         "transactionDate": "2024-01-02T00:00:00Z", "currentBalance": {"units": "59499"}},
+        {"transactionAmount": {"units": "-2000"}, "narration": "Uber ride",
+         "transactionDate": "2024-02-02T00:00:00Z", "currentBalance": {"units": "57499"}}
+    ]}},
+    "fetch_stock_transactions": {"result": {"transactions": [
+        {"isin": "INE1", "transactionType": "Buy", "transactionDate": "2024-01-10", "navValue": "10", "quantity": "5"}
+    ]}}
+}
+
+
+@pytest.fixture
+def fi_service():
+    """Fi MCP service with canned MCP responses"""
+    service = FiMCPService(Settings())
+
+    async def fake_mcp_call(method, params):
+        return MCP_RESPONSES.get(method, {"result": {}})
+
+    service._make_mcp_call = fake_mcp_call
+    return service
+
+
+def test_fetch_bank_transactions_emits_slotted_records(fi_service):
+    """Processed bank rows are compact slotted records"""
+    bank_data = asyncio.run(fi_service._fetch_bank_transactions())
+
+    tx = bank_data["transactions"][1]
+    assert isinstance(tx, BankTx)
+    assert not hasattr(tx, "__dict__")
+    assert tx.amount == pytest.approx(-500.5)
+    assert tx.category == "food"
+    assert bank_data["monthly_summary"]["2024-01"]["expenses"] == pytest.approx(500.5)
+
+
+def test_fetch_mf_transactions_groups_by_scheme(fi_service):
+    """Scheme totals net out buys and sells"""
+    mf_data = asyncio.run(fi_service._fetch_mf_transactions())
+
+    scheme = mf_data["schemes"]["INF1"]
+    assert all(isinstance(tx, MFTx) for tx in scheme["transactions"])
+    assert scheme["total_invested"] == pytest.approx(500.0)
+    assert scheme["total_units"] == pytest.approx(6.0)
+
+
+def test_financial_data_is_json_serializable(fi_service):
+    """Slotted records are exported as plain dicts at the service boundary"""
+    data = asyncio.run(fi_service.get_user_financial_data("test_user"))
+
+    encoded = json.loads(json.dumps(data))
+    assert encoded["bank_transactions"]["transactions"][0]["narration"] == "SALARY CREDIT"
+    assert encoded["mutual_funds"]["schemes"]["INF1"]["transactions"][0]["type"] == "BUY"
+    assert encoded["accounts"][0]["balance"] == pytest.approx(100000.5)
+    assert [tx["date"] for tx in encoded["transactions"]] == sorted(
+        (tx["date"] for tx in encoded["transactions"]), reverse=True
+    )
+
+
+def test_failed_fetch_defaults_to_empty(fi_service):
+    """One failing MCP fetch does not sink the other sources"""
+    async def broken_fetch():
+        raise RuntimeError("credit bureau down")
+
+    fi_service._fetch_credit_report = broken_fetch
+    data = asyncio.run(fi_service.get_user_financial_data("test_user"))
+
+    assert data["credit_report"] == {}
+    assert data["user_id"] == "test_user"
+    assert data["bank_transactions"]["total_transactions"] == 3
@@ -0,0 +1,91 @@
+# backend/tests/test_on_device_ai.py
+import asyncio
+import ollama
+from backend.services import on_device_ai
+from backend.services.on_device_ai import OnDeviceAI
+
+
+def test_quick_score_reuses_repeat_purchases(monkeypatch):
+    """Repeat purchases skip the local model; a different amount is scored afresh"""
+    calls = []
+
+    def fake_generate(model, prompt, options, keep_alive=None):
+        calls.append(prompt)
+        return {"response": '{"score": 72, "reasoning": "Fits the budget"}'}
+
+    monkeypatch.setattr(on_device_ai.ollama, "generate", fake_generate)
+    ai = OnDeviceAI()
+    ai.model_loaded = True
+
+    async def scenario():
+        first = await ai.quick_decision_score(12000, "electronics", {"income": 100000})
+        first["score"] = 0
+        second = await ai.quick_decision_score(12000, "electronics", {"income": 100000})
+        await ai.quick_decision_score(13000, "electronics", {"income": 100000})
+        return second
+
+    second = asyncio.run(scenario())
+    assert second == {"score": 72, "reasoning": "Fits the budget"}
+    assert len(calls) == 2
+
+
+def test_basic_health_metrics_sum_accounts_and_expenses():
+    """Savings and checking add up; only outgoing transactions count as expenses"""
+    metrics = OnDeviceAI()._calculate_basic_health_metrics({
+        "accounts": {"savings": 80000, "checking": 20000, "credit_used": 10000},
+        "transactions": [{"amount": -1500}, {"amount": 50000}, {"amount": -500}]
+    })
+
+    assert metrics["net_worth"] == 90000
+    assert metrics["monthly_expenses"] == 2000
+    assert metrics["calculation_method"] == "local"
+
+
+def test_concurrent_quick_scores_share_one_generation(monkeypatch):
+    """A burst of quick-score requests is answered by a single batched prompt"""
+    calls = []
+
+    def fake_generate(model, prompt, options, keep_alive=None):
+        calls.append(prompt)
+        return {"response": '[{"score": 80, "reasoning": "a"}, {"score": 40, "reasoning": "b"}, '
+                            '{"score": 65, "reasoning": "c"}]'}
+
+    monkeypatch.setattr(on_device_ai.ollama, "generate", fake_generate)
+    ai = OnDeviceAI()
+    ai.model_loaded = True
+
+    async def scenario():
+        return await asyncio.gather(
+            ai.quick_decision_score(20000, "education", {}),
+            ai.quick_decision_score(90000, "luxury", {}),
+            ai.quick_decision_score(3000, "food", {})
+        )
+
+    scores = asyncio.run(scenario())
+    assert [score["score"] for score in scores] == [80, 40, 65]
+    assert len(calls) == 1
+
+
+def test_parse_local_response_stops_at_first_json_object():
+    """Trailing prose or a second JSON blob does not break parsing"""
+    parsed = OnDeviceAI()._parse_local_response('Here you go: {"score": 70, "reasoning": "ok"} {"score": 10} }')
+
+    assert parsed == {"score": 70, "reasoning": "ok"}
+
+
+def test_initialize_model_skips_pull_for_local_models(monkeypatch):
+    """Warm starts reuse models already present in Ollama instead of pulling again"""
+    pulls = []
+    ai = OnDeviceAI()
+    present = [ollama.ListResponse.Model(model=ai.fast_model), ollama.ListResponse.Model(model=ai.accurate_model)]
+
+    monkeypatch.setattr(on_device_ai.ollama, "list", lambda: ollama.ListResponse(models=present))
+    monkeypatch.setattr(on_device_ai.ollama, "show", lambda model: {"details": {"quantization_level": "Q4_K_M"}})
+    monkeypatch.setattr(on_device_ai.ollama, "generate",
+                        lambda model, prompt, options, keep_alive=None: {"response": "Model loaded successfully"})
+    monkeypatch.setattr(on_device_ai.subprocess, "run", lambda *args, **kwargs: pulls.append(args))
+
+    asyncio.run(ai.initialize_model())
+
+    assert ai.model_loaded
+    assert pulls == []
@@ -0,0 +1,197 @@
+# backend/tests/test_opportunity_engine.py
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+import numpy as np
+from backend.services.opportunity_engine import OpportunityEngine, Opportunity, composite_scores
+
+
+@pytest.fixture
+def engine():
+    """Opportunity engine without cloud dependencies"""
+    return OpportunityEngine(vertex_ai=None, firestore=None, fi_mcp=None)
+
+
+def test_precompute_aggregates_user_data_once(engine):
+    """Shared aggregates cover accounts, investments and both transaction views"""
+    recent = datetime.now(timezone.utc) - timedelta(days=3)
+    agg = engine._precompute({
+        "accounts": [{"type": "savings", "balance": 60000}, {"type": "fd", "balance": 40000}],
+        "investments": [{"category": "elss", "current_value": 30000}, {"category": "equity", "current_value": 70000}],
+        "user_profile": {"annual_income": 1200000},
+        "transactions": [
+            {"amount": -12000, "category": "food", "date": recent.isoformat()},
+            {"amount": -3000, "category": "food", "date": "2024-01-15"},
+            {"amount": 50000, "category": "salary", "date": "2024-01-01"},
+            {"amount": -100, "category": "food", "date": "not a date"}
+        ]
+    })
+
+    assert agg.total_savings == 60000
+    assert agg.total_liquid == 100000
+    assert agg.total_investments == 100000
+    assert agg.tax_saver_investments == 30000
+    assert agg.spending_by_category == {"food": 12000}
+    assert agg.monthly_expenses == pytest.approx(7500)
+    assert agg.age == 30
+
+
+def test_malformed_rows_are_skipped_not_fatal(engine):
+    """Non-numeric amounts and balances are ignored instead of failing the whole analysis"""
+    recent = (datetime.now(timezone.utc) - timedelta(days=2)).isoformat()
+    user_data = {
+        "accounts": [{"type": "savings", "balance": "n/a"}, {"type": "savings", "balance": "250000"}],
+        "investments": [{"category": "elss", "current_value": {"units": 5}}],
+        "user_profile": {"annual_income": 1200000, "age": 28},
+        "transactions": [
+            {"amount": "abc", "category": "food", "date": recent},
+            {"amount": {"units": "-900"}, "category": "food", "date": recent},
+            {"amount": -15000, "category": "food", "date": recent}
+        ]
+    }
+
+    agg = engine._precompute(user_data)
+    assert agg.total_savings == 250000
+    assert agg.total_investments == 0
+    assert agg.spending_by_category == {"food": 15000}
+
+    result = asyncio.run(engine.generate_opportunities(user_data, analysis_type="quick"))
+    assert result["opportunities"]
+
+
+def test_profile_without_income_or_age_uses_defaults(engine):
+    """Optional profile fields stored as None fall back to defaults instead of failing the request"""
+    user_data = {"transactions": [], "user_profile": {"annual_income": None, "age": None}}
+
+    agg = engine._precompute(user_data)
+    assert agg.annual_income == 0
+    assert agg.age == 30
+    assert agg.monthly_expenses == pytest.approx(30000)
+
+    result = asyncio.run(engine.generate_opportunities(user_data, analysis_type="quick"))
+    assert "opportunities" in result
+
+
+def test_opportunities_exported_as_plain_dicts(engine):
+    """Slotted opportunities become dicts at the boundary, without unset optional fields"""
+    result = asyncio.run(engine.generate_opportunities({
+        "accounts": [{"type": "savings", "balance": 500000}],
+        "user_profile": {"annual_income": 1200000, "age": 28}
+    }, analysis_type="quick"))
+
+    opportunities = {opp["type"]: opp for opp in result["opportunities"]}
+    assert opportunities["savings_optimization"]["action_steps"]
+    assert "action_steps" not in opportunities["income_enhancement"]
+    assert all("composite_score" in opp for opp in result["opportunities"])
+    assert json.loads(json.dumps(result["opportunities"])) == result["opportunities"]
+
+
+def test_precompute_skips_transaction_work_when_empty(engine):
+    """Profile-only users get flags and an income-based expense estimate"""
+    agg = engine._precompute({"user_profile": {"annual_income": 1200000}})
+
+    assert not (agg.has_accounts or agg.has_investments or agg.has_transactions)
+    assert agg.spending_by_category == {}
+    assert agg.monthly_expenses == pytest.approx(60000)
+    assert engine._analyze_spending_optimization(agg) == []
+
+
+def test_ranking_scores_match_stacked_kernel(engine):
+    """Per-request scoring agrees with the shape-agnostic kernel run over stacked arrays"""
+    def opp(value, confidence, effort, priority):
+        return Opportunity(id="x", type="t", priority=priority, title="", description="",
+                           potential_annual_value=value, effort_level=effort, time_to_implement="",
+                           confidence_score=confidence, risk_level="low", category="c")
+
+    batches = [[opp(50000, 0.9, "low", "high"), opp(200000, 0.5, "high", "low")],
+               [opp(10000, 0.8, "medium", "urgent"), opp(90000, 0.95, "low", "medium")]]
+    ranked = [asyncio.run(engine._score_and_rank_opportunities(batch, {})) for batch in batches]
+
+    stacked = composite_scores(np.array([[50000, 200000], [10000, 90000]], dtype=np.float64),
+                               np.array([[0.9, 0.5], [0.8, 0.95]]),
+                               np.array([[0, 2], [1, 0]]), np.array([[1, 3], [0, 2]]))
+    assert [o.composite_score for o in batches[0]] == pytest.approx(stacked[0].tolist())
+    assert [o.composite_score for o in batches[1]] == pytest.approx(stacked[1].tolist())
+    assert ranked[0][0].potential_annual_value == 50000
+    assert ranked[1][0].potential_annual_value == 90000
+
+
+def test_repeated_requests_served_from_result_cache(engine):
+    """Identical user data reuses the cached result; callers get independent copies"""
+    calls = []
+
+    class FakeVertex:
+        async def analyze_market_opportunities(self, user_data):
+            calls.append(user_data)
+            return {"market_opportunities": [{"title": "Gold ETF", "potential_annual_value": 20000}]}
+
+    engine.vertex_ai = FakeVertex()
+    user_data = {"user_profile": {"annual_income": 900000, "age": 35}}
+
+    async def run():
+        return await asyncio.gather(*(engine.generate_opportunities(dict(user_data)) for _ in range(3)))
+
+    first, second, third = asyncio.run(run())
+    second["opportunities"].clear()
+
+    assert len(calls) == 1
+    assert first["opportunities"] == third["opportunities"]
+    assert asyncio.run(engine.generate_opportunities(user_data))["opportunities"] == first["opportunities"]
+    assert asyncio.run(engine.generate_opportunities(user_data, analysis_type="quick")) != first
+    assert not engine._result_locks
+
+
+def test_market_context_not_shared_between_results(engine):
+    """Mutating one result's market context leaves later results untouched"""
+    first = asyncio.run(engine.generate_opportunities({"user_profile": {"age": 40}}, analysis_type="quick"))
+    first["market_context"]["interest_rates"]["repo_rate"] = 0
+
+    second = asyncio.run(engine.generate_opportunities({"user_profile": {"age": 41}}, analysis_type="quick"))
+    assert second["market_context"]["interest_rates"]["repo_rate"] == 6.5
+
+
+def test_refetched_data_with_new_timestamp_hits_result_cache(engine):
+    """Payloads differing only in Fi MCP fetch stamps share one cached result"""
+    calls = []
+    original = engine._generate_opportunities
+
+    async def counting_generate(user_data, analysis_type):
+        calls.append(user_data)
+        return await original(user_data, analysis_type)
+
+    engine._generate_opportunities = counting_generate
+    profile = {"user_profile": {"annual_income": 900000, "age": 35}}
+
+    asyncio.run(engine.generate_opportunities({**profile, "last_updated": "2024-05-01T10:00:00"}, "quick"))
+    asyncio.run(engine.generate_opportunities({**profile, "last_updated": "2024-05-01T10:00:07",
+                                               "timestamp": "2024-05-01T10:00:07", "is_real_time": True}, "quick"))
+    assert len(calls) == 1
+
+
+def test_failed_computation_does_not_restart_stampede(engine):
+    """A caller arriving as a failed computation releases its lock queues behind the woken waiter"""
+    calls, late = [], []
+
+    async def flaky_generate(user_data, analysis_type):
+        calls.append(analysis_type)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            # Starts on the same loop turn in which the waiter is woken, before it re-acquires the lock
+            late.append(asyncio.ensure_future(engine.generate_opportunities({"user_profile": {}})))
+            raise RuntimeError("vertex down")
+        return {"opportunities": []}
+
+    engine._generate_opportunities = flaky_generate
+
+    async def run():
+        first = asyncio.ensure_future(engine.generate_opportunities({"user_profile": {}}))
+        waiter = asyncio.ensure_future(engine.generate_opportunities({"user_profile": {}}))
+        results = await asyncio.gather(first, waiter, return_exceptions=True)
+        return results + [await late[0]]
+
+    results = asyncio.run(run())
+    assert isinstance(results[0], RuntimeError)
+    assert results[1:] == [{"opportunities": []}] * 2
+    assert len(calls) == 2
+    assert not engine._result_locks
@@ -0,0 +1,124 @@
+# backend/tests/test_user_service.py
+import pytest
+import asyncio
+from backend.services.user_service import UserService
+from backend.services.auth_service import AuthService
+from backend.models.configs import Settings
+
+
+class FakeFirestore:
+    """In-memory stand-in for the Firestore user collection"""
+
+    def __init__(self):
+        self.users = {}
+        self.reads = 0
+
+    async def create_user(self, user_data):
+        user = {**user_data, "user_id": f"user_{len(self.users) + 1}"}
+        self.users[user["user_id"]] = user
+        return user
+
+    async def get_user_by_email(self, email):
+        return next((u for u in self.users.values() if u["email"] == email), None)
+
+    async def get_user_by_id(self, user_id, fields=None):
+        self.reads += 1
+        self.last_fields = fields
+        await asyncio.sleep(0.01)
+        user = self.users.get(user_id)
+        if user is not None and fields:
+            return {field: user[field] for field in fields if field in user}
+        return user
+
+    async def get_users_by_ids(self, user_ids):
+        self.reads += 1
+        return {user_id: self.users.get(user_id) for user_id in user_ids}
+
+    async def update_user(self, user_id, update_data):
+        self.users[user_id].update(update_data)
+        return True
+
+
+@pytest.fixture
+def user_service():
+    """User service over an in-memory user store"""
+    return UserService(FakeFirestore(), AuthService(Settings()))
+
+
+def test_create_and_authenticate_hash_off_loop(user_service):
+    """Signup and login round-trip through the crypto pool without leaking hashes"""
+    async def run():
+        created = await user_service.create_user({"email": "a@example.com", "name": "A", "password": "s3cret!"})
+        good = await user_service.authenticate_user("a@example.com", "s3cret!")
+        bad = await user_service.authenticate_user("a@example.com", "wrong")
+        return created, good, bad
+
+    created, good, bad = asyncio.run(run())
+
+    assert "password_hash" not in created and "password" not in created
+    assert good["user_id"] == created["user_id"]
+    assert bad is None
+    assert user_service.firestore.users[created["user_id"]]["password_hash"].startswith("$2")
+
+
+def test_unknown_email_still_runs_password_check(user_service):
+    """Missing users pay the same bcrypt verification as wrong passwords"""
+    checked = []
+    verify_password = user_service.auth.verify_password
+
+    def spy(password, password_hash):
+        checked.append(password_hash)
+        return verify_password(password, password_hash)
+
+    user_service.auth.verify_password = spy
+
+    assert asyncio.run(user_service.authenticate_user("nobody@example.com", "guess")) is None
+    assert checked == [user_service._dummy_password_hash]
+
+
+def test_concurrent_user_lookups_share_one_read(user_service):
+    """Parallel profile and context loads collapse into a single projected read"""
+    user_service.firestore.users["user_1"] = {
+        "user_id": "user_1", "name": "A", "email": "a@example.com", "password_hash": "x", "age": 31
+    }
+
+    async def run():
+        return await asyncio.gather(
+            user_service.get_user_profile("user_1"),
+            user_service.get_user_context("user_1"),
+            user_service.get_user_profile("user_1")
+        )
+
+    profile, context, _ = asyncio.run(run())
+
+    assert user_service.firestore.reads == 1
+    assert "password_hash" not in user_service.firestore.last_fields
+    assert profile["name"] == "A" and context["age"] == 31
+    assert "password_hash" not in asyncio.run(user_service.get_user("user_1"))
+    assert user_service.firestore.users["user_1"]["password_hash"] == "x"  # stored/cached doc untouched
+    assert not user_service._inflight_users
+
+
+def test_update_profile_filters_fields_and_skips_empty_writes(user_service):
+    """Only editable fields are written, and an update with none of them is a no-op"""
+    user_service.firestore.users["user_1"] = {"user_id": "user_1", "email": "a@example.com", "password_hash": "x"}
+
+    assert asyncio.run(user_service.update_user_profile("user_1", {"city": "Pune", "password_hash": "y"}))
+    assert user_service.firestore.users["user_1"]["city"] == "Pune"
+    assert user_service.firestore.users["user_1"]["password_hash"] == "x"
+
+    user_service.firestore.update_user = None  # any write would now fail
+    assert asyncio.run(user_service.update_user_profile("user_1", {"email": "b@example.com"})) is True
+
+
+def test_get_users_by_ids_is_one_batched_read(user_service):
+    """Multi-user lookups issue one read and never expose password hashes"""
+    for n in (1, 2):
+        user_service.firestore.users[f"user_{n}"] = {"user_id": f"user_{n}", "name": str(n), "password_hash": "x"}
+
+    users = asyncio.run(user_service.get_users_by_ids(["user_1", "user_2", "missing"]))
+
+    assert user_service.firestore.reads == 1
+    assert users["user_1"] == {"user_id": "user_1", "name": "1"}
+    assert users["user_2"]["name"] == "2"
+    assert users["missing"] is None
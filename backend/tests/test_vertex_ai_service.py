@@ -0,0 +1,206 @@
+# backend/tests/test_vertex_ai_service.py
+import pytest
+import asyncio
+from types import SimpleNamespace
+from backend.services.vertex_ai_service import VertexAIService
+from backend.models.configs import Settings
+from backend.utils.cache import CacheService, SemanticCache
+from google.api_core.exceptions import PermissionDenied, ServiceUnavailable
+
+
+class FakeModel:
+    """Async stand-in for a Gemini GenerativeModel"""
+
+    def __init__(self, text, latency=0.0, errors=()):
+        self.text = text
+        self.latency = latency
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def generate_content_async(self, prompt, generation_config=None, safety_settings=None, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self.errors:
+            raise self.errors.pop(0)
+        if stream:
+            return self._stream()
+        return SimpleNamespace(text=self.text)
+
+    async def _stream(self):
+        for i in range(0, len(self.text), 8):
+            yield SimpleNamespace(text=self.text[i:i + 8])
+
+
+@pytest.fixture
+def vertex_service():
+    """Vertex AI service with fake models and a private in-process cache"""
+    service = VertexAIService(Settings())
+    service.gemini_flash = FakeModel('{"response": "Spend less on dining", "confidence": 0.9}')
+    service.cache = CacheService()
+    service.semantic_cache = None
+    return service
+
+
+def test_identical_chat_prompts_hit_response_cache(vertex_service):
+    """A repeated prompt is answered from cache without another model call"""
+    first = asyncio.run(vertex_service.generate_chat_response("How do I save?", {"net_worth": 100000}))
+    first["response"] = "mutated by caller"
+    second = asyncio.run(vertex_service.generate_chat_response("How do I save?", {"net_worth": 100000}))
+
+    assert vertex_service.gemini_flash.calls == 1
+    assert second["response"] == "Spend less on dining"
+    assert second["suggestions"] == []
+
+    asyncio.run(vertex_service.generate_chat_response("How do I invest?", {"net_worth": 100000}))
+    assert vertex_service.gemini_flash.calls == 2
+
+
+def test_unparseable_and_sampled_responses_not_cached(vertex_service):
+    """Parse failures and high-temperature generations always go to the model"""
+    vertex_service.gemini_flash.text = "not json"
+    for _ in range(2):
+        asyncio.run(vertex_service._cached_generate(
+            vertex_service.gemini_flash, "gemini-1.5-flash", "prompt", vertex_service.flash_config, 60))
+    assert vertex_service.gemini_flash.calls == 2
+
+    vertex_service.gemini_flash.text = '{"ok": true}'
+    for _ in range(2):
+        asyncio.run(vertex_service._cached_generate(
+            vertex_service.gemini_flash, "gemini-1.5-flash", "prompt", {"temperature": 0.9}, 60))
+    assert vertex_service.gemini_flash.calls == 4
+
+
+def test_concurrent_identical_prompts_share_one_call(vertex_service):
+    """In-flight duplicates await the first request and get independent copies"""
+    vertex_service.gemini_flash.latency = 0.05
+
+    async def run():
+        return await asyncio.gather(*(
+            vertex_service.generate_chat_response("Can I afford a car?", {"net_worth": 500000}) for _ in range(4)
+        ))
+
+    results = asyncio.run(run())
+
+    assert vertex_service.gemini_flash.calls == 1
+    assert len({id(result) for result in results}) == 4
+    assert all(result["response"] == "Spend less on dining" for result in results)
+    assert not vertex_service._inflight
+
+
+def test_parse_json_response_handles_surrounding_text(vertex_service):
+    """The first JSON object is extracted from fenced or annotated model output"""
+    fenced = '```json\n{"score": 72, "alternatives": [{"option": "wait"}]}\n```'
+    annotated = '{"score": 64} Note: figures assume {current} rates.'
+
+    assert vertex_service._parse_json_response(fenced)["alternatives"][0]["option"] == "wait"
+    assert vertex_service._parse_json_response(annotated) == {"score": 64}
+    assert vertex_service._parse_json_response("no json here")["error"] == "No JSON found"
+    assert vertex_service._parse_json_response('{"score": }')["error"] == "Invalid JSON"
+
+
+def test_stream_chat_response_yields_chunks_then_parsed_reply(vertex_service):
+    """Streamed text reassembles into the same structured reply as the blocking call"""
+    async def collect():
+        return [event async for event in vertex_service.stream_chat_response("How do I save?", {})]
+
+    events = asyncio.run(collect())
+
+    assert [e["type"] for e in events[:-1]] == ["chunk"] * (len(events) - 1)
+    assert "".join(e["text"] for e in events[:-1]) == vertex_service.gemini_flash.text
+    assert events[-1]["type"] == "complete"
+    assert events[-1]["response"]["response"] == "Spend less on dining"
+    assert events[-1]["response"]["actions"] == []
+
+
+def test_transient_errors_retried_and_permanent_errors_fail_fast(vertex_service):
+    """A 503 is retried once with a short backoff; a permission error goes straight to the fallback"""
+    vertex_service.gemini_flash.errors = [ServiceUnavailable("overloaded")]
+    reply = asyncio.run(vertex_service.generate_chat_response("Should I prepay my loan?", {}))
+
+    assert vertex_service.gemini_flash.calls == 2
+    assert reply["response"] == "Spend less on dining"
+
+    vertex_service.gemini_flash.errors = [PermissionDenied("no access")]
+    reply = asyncio.run(vertex_service.generate_chat_response("Should I buy gold?", {}))
+
+    assert vertex_service.gemini_flash.calls == 3
+    assert reply["confidence"] == 0.5
+
+
+def test_paraphrased_chat_question_hits_semantic_cache(vertex_service):
+    """Similar questions share an answer only within an identical financial context"""
+    embeddings = {"How do I save?": [1.0, 0.0], "How can I save money?": [0.97, 0.2], "Buy a car?": [0.0, 1.0]}
+
+    async def fake_embed(text):
+        return embeddings[text]
+
+    vertex_service._embed = fake_embed
+    vertex_service.semantic_cache = SemanticCache(threshold=0.92)
+
+    for message in ("How do I save?", "How can I save money?"):
+        reply = asyncio.run(vertex_service.generate_chat_response(message, {"net_worth": 100000}))
+        assert reply["response"] == "Spend less on dining"
+    assert vertex_service.gemini_flash.calls == 1
+
+    asyncio.run(vertex_service.generate_chat_response("Buy a car?", {"net_worth": 100000}))
+    asyncio.run(vertex_service.generate_chat_response("How can I save money?", {"net_worth": 900000}))
+    assert vertex_service.gemini_flash.calls == 3
+
+
+def test_semantic_cache_never_reuses_answer_for_different_amount(vertex_service):
+    """Questions differing only in an amount embed alike but must not share an answer"""
+    async def fake_embed(text):
+        return [1.0, 0.01 * len(text)]
+
+    vertex_service._embed = fake_embed
+    vertex_service.semantic_cache = SemanticCache(threshold=0.92)
+
+    for message in ("Can I afford ₹50k?", "Can I afford ₹5 lakh?", "Can I afford ₹50,000?"):
+        asyncio.run(vertex_service.generate_chat_response(message, {"net_worth": 100000}))
+    assert vertex_service.gemini_flash.calls == 3
+
+    asyncio.run(vertex_service.generate_chat_response("Could I afford ₹50k?", {"net_worth": 100000}))
+    assert vertex_service.gemini_flash.calls == 3
+
+
+def test_real_time_monitoring_uses_one_model_call(vertex_service):
+    """Health metrics and anomalies for a snapshot share a single request"""
+    vertex_service.gemini_flash.text = (
+        '{"health": {"score": 64, "alerts": []}, '
+        '"anomalies": [{"type": "spending", "severity": "high", "value": 15000}]}'
+    )
+    health, anomalies = asyncio.run(vertex_service.monitor_real_time_data({"balance": 42000}))
+
+    assert vertex_service.gemini_flash.calls == 1
+    assert health["score"] == 64
+    assert anomalies[0]["severity"] == "high"
+
+    vertex_service.gemini_flash.text = "not json"
+    health, anomalies = asyncio.run(vertex_service.monitor_real_time_data({"balance": 1}))
+    assert health["score"] == 75 and anomalies == []
+
+
+def test_fetch_stamps_do_not_change_response_cache_key(vertex_service):
+    """Snapshots differing only in their fetch timestamps share one cached response"""
+    vertex_service.gemini_flash.text = '{"health": {"score": 70}, "anomalies": []}'
+    snapshot = {"accounts": [{"type": "savings", "balance": 42000}]}
+
+    for second in ("01", "11"):
+        asyncio.run(vertex_service.monitor_real_time_data({
+            **snapshot, "last_updated": f"2024-05-01T10:00:{second}",
+            "timestamp": f"2024-05-01T10:00:{second}", "is_real_time": True
+        }))
+    assert vertex_service.gemini_flash.calls == 1
+
+    vertex_service.gemini_flash.text = '{"insights": ["Build an emergency fund"]}'
+    for second in ("01", "11"):
+        asyncio.run(vertex_service.generate_dashboard_insights({**snapshot, "last_updated": f"2024-05-01T10:00:{second}"}))
+    assert vertex_service.gemini_flash.calls == 2
+
+
+def test_service_instances_share_models():
+    """Repeated construction reuses the process-wide Gemini models"""
+    first, second = VertexAIService(Settings()), VertexAIService(Settings())
+
+    assert first.gemini_flash is second.gemini_flash
+    assert first.gemini_pro is second.gemini_pro
@@ -0,0 +1,186 @@
+# backend/utils/cache.py
+import copy
+import json
+import time
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Union
+import numpy as np
+import structlog
+from cachetools import LRUCache, TTLCache
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis is optional; fall back to an in-process cache
+    aioredis = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+logger = structlog.get_logger()
+
+# Short TTL for volatile Fi MCP derived data (balances, chat context)
+FINANCIAL_STATE_TTL = 30
+
+# Per-fetch stamps on Fi MCP payloads; they change on every call and never belong in a cache key
+VOLATILE_FIELDS = frozenset({"last_updated", "timestamp", "is_real_time"})
+
+
+def stable_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Payload without its per-fetch stamps, so unchanged financial data hashes the same"""
+    return {key: value for key, value in data.items() if key not in VOLATILE_FIELDS}
+
+
+# Datetimes are tagged on the way into Redis so reads return datetime, as the in-process cache does
+_DATETIME_TAG = "$datetime"
+
+
+def _default(value: Any) -> Any:
+    """JSON fallback: tag datetimes for revival, stringify other unknown types"""
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    return str(value)
+
+
+def _revive(value: Any) -> Any:
+    """Turn tagged datetimes in a decoded value back into datetime objects"""
+    if isinstance(value, dict):
+        if len(value) == 1 and _DATETIME_TAG in value:
+            return datetime.fromisoformat(value[_DATETIME_TAG])
+        return {key: _revive(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_revive(item) for item in value]
+    return value
+
+
+def _encode(value: Any) -> Union[str, bytes]:
+    """Serialize a value for Redis"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(value, default=_default)
+
+
+def _decode(raw: Union[str, bytes]) -> Any:
+    """Deserialize a value read from Redis"""
+    value = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    # Values without datetimes skip the revival walk
+    tag = f'"{_DATETIME_TAG}"'
+    return _revive(value) if (tag.encode() if isinstance(raw, bytes) else tag) in raw else value
+
+
+class CacheService:
+    """Read-through cache backed by Redis when configured, in-process LRU otherwise
+
+    Both backends hand out independent copies: Redis decodes afresh on every read, and the in-process
+    store deep-copies on set and get, so callers may mutate what they store or receive.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None, default_ttl: int = 300, max_local_entries: int = 10000):
+        self.default_ttl = default_ttl
+        self.redis = None
+        self._local = LRUCache(maxsize=max_local_entries)
+
+        if redis_url and aioredis is not None:
+            self.redis = aioredis.from_url(redis_url, decode_responses=True)
+            logger.info("✅ Redis cache configured")
+        else:
+            logger.info("✅ In-process cache configured")
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss"""
+        if self.redis is not None:
+            try:
+                raw = await self.redis.get(key)
+                return _decode(raw) if raw is not None else None
+            except Exception as e:
+                logger.warning("⚠️ Cache read failed", key=key, error=str(e))
+                return None
+
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return copy.deepcopy(value)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Cache a value for ttl seconds"""
+        ttl = ttl or self.default_ttl
+
+        if self.redis is not None:
+            try:
+                await self.redis.set(key, _encode(value), ex=ttl)
+            except Exception as e:
+                logger.warning("⚠️ Cache write failed", key=key, error=str(e))
+            return
+
+        self._local[key] = (time.monotonic() + ttl, copy.deepcopy(value))
+
+    async def delete(self, *keys: str):
+        """Invalidate cached keys"""
+        if self.redis is not None:
+            try:
+                await self.redis.delete(*keys)
+            except Exception as e:
+                logger.warning("⚠️ Cache invalidation failed", keys=keys, error=str(e))
+            return
+
+        for key in keys:
+            self._local.pop(key, None)
+
+    async def cleanup(self):
+        """Close the Redis connection pool, if any"""
+        if self.redis is not None:
+            await self.redis.aclose()
+        logger.info("🧹 Cache service cleaned up")
+
+
+class SemanticCache:
+    """In-process nearest-neighbour cache: reuses a value stored for a query whose embedding is close enough"""
+
+    def __init__(self, threshold: float = 0.92, ttl: int = 300, max_namespaces: int = 1024,
+                 max_entries_per_namespace: int = 32):
+        self.threshold = threshold
+        self.max_entries_per_namespace = max_entries_per_namespace
+        # namespace -> (row-normalized embedding matrix, values); lookups never cross namespaces
+        self._namespaces = TTLCache(maxsize=max_namespaces, ttl=ttl)
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, namespace: str, embedding: Sequence[float]) -> Optional[Any]:
+        """Value of the most similar cached query in the namespace, or None below the threshold"""
+        entry = self._namespaces.get(namespace)
+        if entry is None:
+            return None
+
+        vectors, values = entry
+        similarities = vectors @ self._normalize(embedding)
+        best = int(np.argmax(similarities))
+        return values[best] if similarities[best] >= self.threshold else None
+
+    def set(self, namespace: str, embedding: Sequence[float], value: Any):
+        """Remember a value under a query embedding, evicting the namespace's oldest entries"""
+        vector = self._normalize(embedding)[np.newaxis, :]
+        entry = self._namespaces.get(namespace)
+        if entry is None:
+            vectors, values = vector, [value]
+        else:
+            vectors = np.vstack((entry[0], vector))[-self.max_entries_per_namespace:]
+            values = (entry[1] + [value])[-self.max_entries_per_namespace:]
+        self._namespaces[namespace] = (vectors, values)
+
+
+@lru_cache(maxsize=None)
+def get_cache(redis_url: Optional[str], default_ttl: int) -> CacheService:
+    """Process-wide cache shared by all services"""
+    return CacheService(redis_url=redis_url, default_ttl=default_ttl)
@@ -158,6 +158,13 @@ setup_firestore() {
     else
         echo -e "${YELLOW}ℹ️ Firestore database already exists${NC}"
     fi
+
+    # Composite index for recent-analysis lookups (user_id ==, created_at DESC)
+    gcloud firestore indexes composite create \
+        --collection-group=analyses \
+        --field-config=field-path=user_id,order=ascending \
+        --field-config=field-path=created_at,order=descending \
+        --async 2>/dev/null || echo -e "${YELLOW}ℹ️ Analyses index already exists${NC}"
 }
 
 # Setup Artifact Registry